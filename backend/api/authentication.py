@@ -0,0 +1,89 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import constants
+
+User = get_user_model()
+
+
+def deny_session(refresh_token):
+    """
+    Revoke a refresh token and every access token issued from it,
+    until the refresh token expires anyway.
+    """
+    timeout = refresh_token['exp'] - int(time.time())
+    if timeout > 0:
+        cache.set(constants.JWT_DENYLIST_KEY.format(
+            refresh_token[constants.JWT_SESSION_CLAIM]), True, timeout)
+
+
+def is_denied(token):
+    """
+    Check whether the session the token belongs to was revoked.
+    """
+    session_id = token.get(constants.JWT_SESSION_CLAIM)
+    if session_id is None:
+        return True
+    return cache.get(constants.JWT_DENYLIST_KEY.format(session_id)) is not None
+
+
+def load_user(user_id):
+    """
+    Load an active user authenticated by an access token.
+    """
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        raise AuthenticationFailed(constants.ERROR_USER_NOT_FOUND)
+    if not user.is_active:
+        raise AuthenticationFailed(constants.ERROR_USER_INACTIVE)
+    return user
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    User authenticated by an access token. The ID and the staff flag
+    are read from the token, any other attribute loads the user from
+    the database on first access.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: load_user(user_id))
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            is_staff=token.get(constants.JWT_STAFF_CLAIM, False),
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        # Permission checks test the user for truth, which would
+        # otherwise load it.
+        return True
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authentication by signed access tokens, checked against the
+    denylist in the cache instead of the database.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_denied(token):
+            raise InvalidToken(constants.ERROR_TOKEN_REVOKED)
+        return token
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(constants.ERROR_TOKEN_NO_USER)
+        return TokenUser(validated_token)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.models import Tag
+
+
+def generation_key(model):
+    return f'generation:{model._meta.label_lower}'
+
+
+def get_generation(model):
+    """
+    Return the current generation of the model's data.
+    """
+    return cache.get_or_set(
+        generation_key(model), time.time_ns(), timeout=None)
+
+
+def bump_generation(model):
+    """
+    Start a new generation of the model's data, so everything
+    cached for the previous one is no longer used.
+    """
+    key = generation_key(model)
+    cache.add(key, time.time_ns(), timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_tag_map():
+    """
+    Return a mapping of tag slugs to tag IDs for the current
+    tag generation.
+    """
+    return cache.get_or_set(
+        f'tag-map:{get_generation(Tag)}',
+        lambda: dict(Tag.objects.values_list('slug', 'pk')),
+        settings.REFERENCE_CACHE_TIMEOUT
+    )
+
+
+class CachedResponseMixin:
+    """
+    Cache list and detail responses of a read-only view set until
+    its model data changes and answer If-None-Match with 304.
+    """
+
+    def get_cache_key(self, request):
+        return 'response:{}:{}:{}:{}'.format(
+            self.queryset.model._meta.label_lower,
+            get_generation(self.queryset.model),
+            request.accepted_renderer.format,
+            request.get_full_path(),
+        )
+
+    def cached_response(self, get_response):
+        """
+        Return the cached response data with a strong ETag,
+        building it with get_response on a cache miss.
+        """
+        key = self.get_cache_key(self.request)
+        cached = cache.get(key)
+        if cached is None:
+            response = get_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = '"{}"'.format(hashlib.sha1(json.dumps(
+                response.data, ensure_ascii=False, default=str
+            ).encode()).hexdigest())
+            cached = (etag, response.data)
+            cache.set(key, cached, settings.REFERENCE_CACHE_TIMEOUT)
+        etag, data = cached
+        if_none_match = self.request.headers.get('If-None-Match', '')
+        if any(tag == '*' or tag.replace('W/', '', 1) == etag
+               for tag in parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            lambda: super(CachedResponseMixin, self).list(
+                request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            lambda: super(CachedResponseMixin, self).retrieve(
+                request, *args, **kwargs))
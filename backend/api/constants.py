@@ -1,4 +1,3 @@
-ERROR_NO_INGREDIENT_ID = 'Ingredient ID is required'
 ERROR_INGREDIENT_DB = 'Ingredient with ID {} does not exist in the database'
 ERROR_NO_INGREDIENT = 'At least one ingredient must be specified!'
 ERROR_DUPLICATE_INGREDIENT = ('Ingredient with ID {} '
@@ -12,3 +11,42 @@ RECIPE_ALREADY_IN_LIST = 'Recipe already added to {}'
 RECIPE_DOES_NOT_EXIST = 'Recipe with ID {} does not exist in the database'
 ERROR_DELETE_SUBSCRIPTION = 'Subscription does not exist'
 RECIPE_NOT_IN_LIST = 'Recipe was not added to {}'
+ERROR_UNKNOWN_FIELDS = 'Unknown fields: {}'
+RECIPE_LIST_FIELDS = ('id', 'tags', 'author', 'is_favorited',
+                      'is_in_shopping_cart', 'name', 'image',
+                      'image_variants', 'cooking_time')
+BULK_RECIPES_MAX = 100
+BULK_ADDED = 'added'
+BULK_ALREADY_ADDED = 'already_added'
+BULK_REMOVED = 'removed'
+BULK_NOT_IN_LIST = 'not_in_list'
+BULK_NOT_FOUND = 'not_found'
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+    'ст. л.': ('ч. л.', 3),
+}
+IMAGE_DIRECTORY = 'recipes/'
+IMAGE_FORMAT = 'WEBP'
+IMAGE_EXTENSION = 'webp'
+IMAGE_QUALITY = 80
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_DIMENSION = 4096
+IMAGE_VARIANTS = {
+    'card': 480,
+    'detail': 960,
+    'retina': 1920,
+}
+ERROR_IMAGE_INVALID = 'Upload a valid image.'
+ERROR_IMAGE_SIZE = 'Image must not exceed {} MB'
+ERROR_IMAGE_DIMENSIONS = 'Image width and height must not exceed {} pixels'
+SEARCH_CONFIG = 'russian'
+RECIPE_SEARCH_TABLE = 'recipes_recipe_fts'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+JWT_STAFF_CLAIM = 'is_staff'
+JWT_SESSION_CLAIM = 'sid'
+JWT_DENYLIST_KEY = 'jwt-denied:{}'
+ERROR_TOKEN_REVOKED = 'Token has been revoked'
+ERROR_TOKEN_NO_USER = 'Token contained no recognizable user identification'
+ERROR_USER_NOT_FOUND = 'User not found'
+ERROR_USER_INACTIVE = 'User is inactive'
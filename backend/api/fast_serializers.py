@@ -0,0 +1,197 @@
+from functools import lru_cache
+from operator import itemgetter
+
+from . import images
+from .membership import FAVORITES, SHOPPING_CART, SUBSCRIPTIONS, get_membership
+from .serializers import (FollowSerializer, IngredientRecipeSerializer,
+                          RecipeSerializer, SimpleRecipeSerializer,
+                          TagSerializer, UserSerializer)
+from recipes.models import IngredientAmount, Recipe, User
+
+IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+
+
+@lru_cache(maxsize=None)
+def field_names(serializer_class):
+    """
+    Return the field names of a serializer in representation order.
+    """
+    return tuple(serializer_class().fields)
+
+
+def image_url(request, name):
+    """
+    Represent a stored image the way ImageField does.
+    """
+    if not name:
+        return None
+    url = IMAGE_STORAGE.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def image_variants(request, name):
+    """
+    Represent the image variants the way RecipeSerializer does.
+    """
+    return {variant: request.build_absolute_uri(url)
+            for variant, url in images.variant_urls(name).items()}
+
+
+def values(queryset, columns):
+    """
+    Return the queryset as .values() rows of the columns, keeping
+    extra selects and annotations its ordering may rely on.
+    """
+    return queryset.prefetch_related(None).values(
+        *dict.fromkeys((*columns, *queryset.query.extra_select,
+                        *queryset.query.annotations)))
+
+
+class RowSerializer:
+    """
+    Fast-path read serializer building the representation of
+    a DRF serializer from .values() rows, with one accessor per
+    requested field chosen up front instead of DRF field machinery.
+    Subclasses must keep the output equal to serializer_class's.
+    """
+
+    serializer_class = None
+    # Columns each field needs in the rows.
+    columns = {}
+
+    def __init__(self, request, fields=None):
+        self.request = request
+        self.fields = fields or field_names(self.serializer_class)
+
+    def get_columns(self):
+        return dict.fromkeys(
+            column for name in self.fields
+            for column in self.columns.get(name, (name,)))
+
+    def get_accessors(self, rows):
+        """
+        Return a callable per field taking a row, with related data
+        for all the rows loaded beforehand.
+        """
+        return {name: itemgetter(name) for name in self.fields}
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        accessors = self.get_accessors(rows)
+        accessors = [(name, accessors[name]) for name in self.fields]
+        return [{name: get(row) for name, get in accessors} for row in rows]
+
+
+class FastUserSerializer(RowSerializer):
+    """
+    Fast-path counterpart of UserSerializer.
+    """
+
+    serializer_class = UserSerializer
+    columns = {'is_subscribed': ('id',)}
+
+    def get_accessors(self, rows):
+        accessors = super().get_accessors(rows)
+        membership = get_membership(self.request)
+        accessors['is_subscribed'] = (
+            lambda row: membership.contains(SUBSCRIPTIONS, row['id']))
+        return accessors
+
+
+class FastRecipeSerializer(RowSerializer):
+    """
+    Fast-path counterpart of RecipeSerializer, loading authors, tags
+    and ingredients of all the rows with one query each.
+    """
+
+    serializer_class = RecipeSerializer
+    columns = {
+        'tags': ('id',),
+        'author': ('author_id',),
+        'ingredients': ('id',),
+        'is_favorited': ('id',),
+        'is_in_shopping_cart': ('id',),
+        'image_variants': ('image',),
+    }
+
+    def load_authors(self, rows):
+        users = FastUserSerializer(self.request)
+        return {user['id']: user for user in users.to_representation(
+            User.objects.filter(
+                pk__in={row['author_id'] for row in rows}
+            ).values(*users.get_columns()))}
+
+    def load_tags(self, rows):
+        tags = {}
+        names = field_names(TagSerializer)
+        for row in Recipe.tags.through.objects.filter(
+            recipe_id__in=[row['id'] for row in rows]
+        ).order_by('tag__name').values(
+            'recipe_id', *(f'tag__{name}' for name in names)
+        ):
+            tags.setdefault(row['recipe_id'], []).append(
+                {name: row[f'tag__{name}'] for name in names})
+        return tags
+
+    def load_ingredients(self, rows):
+        ingredients = {}
+        sources = {'id': 'ingredient__id', 'name': 'ingredient__name',
+                   'measurement_unit': 'ingredient__measurement_unit',
+                   'amount': 'amount'}
+        names = field_names(IngredientRecipeSerializer)
+        for row in IngredientAmount.objects.filter(
+            recipe_id__in=[row['id'] for row in rows]
+        ).order_by('pk').values('recipe_id', *sources.values()):
+            ingredients.setdefault(row['recipe_id'], []).append(
+                {name: row[sources[name]] for name in names})
+        return ingredients
+
+    def get_accessors(self, rows):
+        accessors = super().get_accessors(rows)
+        request = self.request
+        membership = get_membership(request)
+        accessors['image'] = lambda row: image_url(request, row['image'])
+        accessors['image_variants'] = (
+            lambda row: image_variants(request, row['image']))
+        accessors['is_favorited'] = (
+            lambda row: membership.contains(FAVORITES, row['id']))
+        accessors['is_in_shopping_cart'] = (
+            lambda row: membership.contains(SHOPPING_CART, row['id']))
+        if 'author' in self.fields:
+            authors = self.load_authors(rows)
+            accessors['author'] = lambda row: authors[row['author_id']]
+        if 'tags' in self.fields:
+            tags = self.load_tags(rows)
+            accessors['tags'] = lambda row: tags.get(row['id'], [])
+        if 'ingredients' in self.fields:
+            ingredients = self.load_ingredients(rows)
+            accessors['ingredients'] = (
+                lambda row: ingredients.get(row['id'], []))
+        return accessors
+
+
+class FastFollowSerializer(FastUserSerializer):
+    """
+    Fast-path counterpart of FollowSerializer, loading the recipes
+    of all the authors with one query.
+    """
+
+    serializer_class = FollowSerializer
+    columns = {'is_subscribed': ('id',), 'recipes': ('id',)}
+
+    def __init__(self, request, fields=None, recipes=None):
+        super().__init__(request, fields)
+        self.recipes = recipes if recipes is not None else Recipe.objects
+
+    def get_accessors(self, rows):
+        accessors = super().get_accessors(rows)
+        if 'recipes' in self.fields:
+            recipes = {}
+            names = field_names(SimpleRecipeSerializer)
+            for row in self.recipes.filter(
+                author_id__in=[row['id'] for row in rows]
+            ).values('author_id', *names):
+                row['image'] = image_url(self.request, row['image'])
+                recipes.setdefault(row.pop('author_id'), []).append(row)
+            accessors['recipes'] = lambda row: recipes.get(row['id'], [])
+        return accessors
@@ -1,19 +1,30 @@
 import base64
+import binascii
 
-from django.core.files.base import ContentFile
-from rest_framework.serializers import ImageField
+from rest_framework.serializers import ImageField, ValidationError
+
+from . import constants, images
 
 
 class Base64ImageField(ImageField):
     """
     Custom ImageField to handle base64 encoded images.
+
+    Base64 images are validated here and returned as a pending
+    upload, which the serializer stores under a content-hashed name
+    once the whole request is valid.
     """
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            if len(imgstr) * 3 // 4 > constants.IMAGE_MAX_SIZE:
+                raise ValidationError(constants.ERROR_IMAGE_SIZE.format(
+                    constants.IMAGE_MAX_SIZE // (1024 * 1024)))
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                raise ValidationError(constants.ERROR_IMAGE_INVALID)
+            return images.prepare_upload(content)
 
         return super().to_internal_value(data)
@@ -1,6 +1,13 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe
+from .cache import get_tag_map
+from .search import search_recipes
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_map()]
 
 
 class IngredientFilter(FilterSet):
@@ -12,23 +19,42 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method='filter_tags')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.OrderingFilter(
+        fields=(('favorites_count', 'popularity'), 'pub_date'))
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'is_favorited', 'is_in_shopping_cart', 'author')
+        fields = ('tags', 'is_favorited', 'is_in_shopping_cart', 'author',
+                  'search')
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        tag_map = get_tag_map()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=[tag_map[slug] for slug in value]
+        )))
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favorites__user=user)
+            return queryset.filter(Exists(Favorite.objects.filter(
+                user_id=user.id, recipe=OuterRef('pk'))))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(cart_items__user=user)
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                user_id=user.id, recipe=OuterRef('pk'))))
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
@@ -0,0 +1,179 @@
+import hashlib
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework.serializers import ValidationError
+
+from . import constants
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                              thread_name_prefix='images')
+
+PROCESSED_IMAGE = re.compile(
+    rf'^{constants.IMAGE_DIRECTORY}(?P<digest>[0-9a-f]{{64}})'
+    rf'\.{constants.IMAGE_EXTENSION}$')
+
+
+def image_name(digest, variant=None):
+    """
+    Return the storage name of a processed image or of its variant.
+    """
+    suffix = f'_{variant}' if variant else ''
+    return (f'{constants.IMAGE_DIRECTORY}{digest}{suffix}'
+            f'.{constants.IMAGE_EXTENSION}')
+
+
+def open_image(content):
+    """
+    Open an uploaded image, rejecting it by its header before
+    decoding pixels if it is too large.
+    """
+    # Pillow raises many kinds of errors on malformed or oversized
+    # images, e.g. DecompressionBombError, so any of them rejects
+    # the upload, as Django's ImageField does.
+    try:
+        image = Image.open(io.BytesIO(content))
+    except Exception:
+        raise ValidationError(constants.ERROR_IMAGE_INVALID)
+    width, height = image.size
+    if max(width, height) > constants.IMAGE_MAX_DIMENSION:
+        raise ValidationError(constants.ERROR_IMAGE_DIMENSIONS.format(
+            constants.IMAGE_MAX_DIMENSION))
+    try:
+        image.load()
+        image = ImageOps.exif_transpose(image)
+    except Exception:
+        raise ValidationError(constants.ERROR_IMAGE_INVALID)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA' if 'A' in image.mode or 'transparency' in image.info
+            else 'RGB')
+    return image
+
+
+def save_image(image, name):
+    """
+    Encode the image and store it under the given name.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, constants.IMAGE_FORMAT,
+               quality=constants.IMAGE_QUALITY)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def save_variants(digest, image):
+    """
+    Store downscaled variants of a processed image.
+    """
+    for variant, size in constants.IMAGE_VARIANTS.items():
+        name = image_name(digest, variant)
+        if default_storage.exists(name):
+            continue
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        save_image(thumbnail, name)
+
+
+def log_failure(future):
+    """
+    Log an error raised by a background image task.
+    """
+    exception = future.exception()
+    if exception is not None:
+        logger.error('Storing image variants failed.', exc_info=exception)
+
+
+def schedule(function, *args):
+    """
+    Run an image task in the background, logging its errors.
+    """
+    future = executor.submit(function, *args)
+    future.add_done_callback(log_failure)
+    return future
+
+
+def restore_variants(digest):
+    """
+    Store the missing variants of an already stored image.
+    """
+    with default_storage.open(image_name(digest)) as file:
+        image = Image.open(file)
+        image.load()
+    save_variants(digest, image)
+
+
+# Digests of images whose variants are all stored. Stored files are
+# named by their content, so once there they never change.
+stored_variants = set()
+
+
+def has_variants(digest):
+    """
+    Check whether all variants of a processed image are stored.
+    """
+    if digest not in stored_variants and all(
+            default_storage.exists(image_name(digest, variant))
+            for variant in constants.IMAGE_VARIANTS):
+        stored_variants.add(digest)
+    return digest in stored_variants
+
+
+class PendingUpload:
+    """
+    Uploaded image that passed validation, stored only once the
+    whole request is valid.
+    """
+
+    def __init__(self, digest, image=None):
+        self.digest = digest
+        self.image = image
+
+    def store(self):
+        """
+        Store the image re-encoded under its content-hashed name and
+        schedule its missing variants in the background.
+
+        Identical uploads share the stored file. Returns the storage
+        name of the image.
+        """
+        name = image_name(self.digest)
+        if self.image is None:
+            if not has_variants(self.digest):
+                schedule(restore_variants, self.digest)
+            return name
+        save_image(self.image, name)
+        schedule(save_variants, self.digest, self.image)
+        return name
+
+
+def prepare_upload(content):
+    """
+    Validate an uploaded image, skipping decoding if an identical
+    image is already stored.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    if default_storage.exists(image_name(digest)):
+        return PendingUpload(digest)
+    return PendingUpload(digest, open_image(content))
+
+
+def variant_urls(name):
+    """
+    Return URLs of the variants of a stored image, or of the image
+    itself for images stored before processing was introduced and
+    while the variants are being made.
+    """
+    match = PROCESSED_IMAGE.match(name)
+    if not match or not has_variants(match['digest']):
+        return {variant: default_storage.url(name)
+                for variant in constants.IMAGE_VARIANTS}
+    return {variant: default_storage.url(image_name(match['digest'], variant))
+            for variant in constants.IMAGE_VARIANTS}
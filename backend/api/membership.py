@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Favorite, Follow, ShoppingCart
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+SUBSCRIPTIONS = 'subscriptions'
+
+# Model holding the memberships of each kind and the field with
+# the IDs of the recipes or authors the user is related to.
+MEMBERSHIP_SOURCES = {
+    FAVORITES: (Favorite, 'recipe_id'),
+    SHOPPING_CART: (ShoppingCart, 'recipe_id'),
+    SUBSCRIPTIONS: (Follow, 'author_id'),
+}
+
+
+def membership_key(kind, user_id):
+    return f'membership:{kind}:{user_id}'
+
+
+def load_membership(kind, user_id):
+    """
+    Return the set of IDs of the given kind for the user, loading
+    it from the database when the cache does not have it.
+    """
+    key = membership_key(kind, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        model, field = MEMBERSHIP_SOURCES[kind]
+        ids = frozenset(model.objects.filter(
+            user_id=user_id).values_list(field, flat=True))
+        cache.set(key, ids, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_membership(kind, user_id):
+    cache.delete(membership_key(kind, user_id))
+
+
+class UserMembership:
+    """
+    Favorites, shopping cart and subscriptions of a user, each
+    loaded at most once per request.
+    """
+
+    def __init__(self, user):
+        self.user_id = user.id if user.is_authenticated else None
+        self.sets = {}
+
+    def contains(self, kind, id):
+        if self.user_id is None:
+            return False
+        if kind not in self.sets:
+            self.sets[kind] = load_membership(kind, self.user_id)
+        return id in self.sets[kind]
+
+
+def get_membership(request):
+    """
+    Return the membership of the requesting user, shared by all
+    serializers of the request.
+    """
+    if not hasattr(request, 'membership'):
+        request.membership = UserMembership(request.user)
+    return request.membership
@@ -0,0 +1,241 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = 'unmatched'
+FINGERPRINT_LENGTH = 200
+
+PLACEHOLDER_TUPLE = re.compile(r'\((?:%s, )*%s\)')
+REPEATED_TUPLES = re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """
+    Normalize a query so executions differing only in parameters,
+    IN list lengths or inlined numbers compare equal.
+    """
+    sql = PLACEHOLDER_TUPLE.sub('(...)', sql)
+    sql = REPEATED_TUPLES.sub('(...)', sql)
+    return NUMBER.sub('N', sql)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed upper bounds.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """
+        Yield (upper bound, cumulative count) pairs, ending with +Inf.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting and timing the queries of
+    a request and fingerprinting them to spot repeated ones.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.fingerprints.values())
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def labels(**values):
+    return '{{{}}}'.format(','.join(
+        f'{name}="{escape(value)}"' for name, value in values.items()))
+
+
+class MetricsRegistry:
+    """
+    Process-local request and query metrics, rendered in
+    the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.responses = Counter()
+        self.query_time = Counter()
+        self.duplicates = Counter()
+        self.repeated = Counter()
+
+    def record(self, route, method, status, duration, recorder):
+        with self.lock:
+            self.latency[route, method].observe(duration)
+            self.queries[route, method].observe(recorder.count)
+            self.responses[route, method, status] += 1
+            self.query_time[route, method] += recorder.duration
+            self.duplicates[route, method] += recorder.duplicates
+            for sql, count in recorder.fingerprints.items():
+                if count >= settings.METRICS_REPEATED_QUERY_THRESHOLD:
+                    self.repeated[route, sql[:FINGERPRINT_LENGTH]] += 1
+
+    def render_histogram(self, name, description, histograms):
+        yield f'# HELP {name} {description}'
+        yield f'# TYPE {name} histogram'
+        for (route, method), histogram in histograms.items():
+            for bound, count in histogram.samples():
+                yield '{}_bucket{} {}'.format(name, labels(
+                    route=route, method=method, le=bound), count)
+            yield '{}_sum{} {}'.format(
+                name, labels(route=route, method=method), histogram.sum)
+            yield '{}_count{} {}'.format(
+                name, labels(route=route, method=method), sum(
+                    histogram.counts))
+
+    def render_counter(self, name, description, counter, label_names):
+        yield f'# HELP {name} {description}'
+        yield f'# TYPE {name} counter'
+        for key, value in counter.items():
+            yield '{}{} {}'.format(
+                name, labels(**dict(zip(label_names, key))), value)
+
+    def render(self):
+        with self.lock:
+            lines = [
+                *self.render_histogram(
+                    'foodgram_request_duration_seconds',
+                    'Request latency by route.', self.latency),
+                *self.render_histogram(
+                    'foodgram_request_db_queries',
+                    'Database queries per request by route.', self.queries),
+                *self.render_counter(
+                    'foodgram_responses_total',
+                    'Responses by route and status code.',
+                    self.responses, ('route', 'method', 'status')),
+                *self.render_counter(
+                    'foodgram_db_query_seconds_total',
+                    'Time spent in database queries by route.',
+                    self.query_time, ('route', 'method')),
+                *self.render_counter(
+                    'foodgram_db_duplicate_queries_total',
+                    'Queries repeating an earlier query of the same '
+                    'request, by route.',
+                    self.duplicates, ('route', 'method')),
+                *self.render_counter(
+                    'foodgram_db_repeated_query_requests_total',
+                    'Requests running a query at least '
+                    'METRICS_REPEATED_QUERY_THRESHOLD times, a likely N+1.',
+                    self.repeated, ('route', 'query')),
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Record latency and database queries of every request and
+    report them in a Server-Timing header.
+
+    Streaming responses are recorded once their body is consumed,
+    since their queries run while it is, and get no header.
+
+    Removed from the middleware chain unless METRICS_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.capture(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, recorder,
+                started)
+            return response
+        duration = self.record(request, response, recorder, started)
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries, '
+            f'{recorder.duplicates} duplicated"'
+        )
+        return response
+
+    @staticmethod
+    def capture(recorder):
+        """
+        Return a context manager passing the queries of all database
+        connections to the recorder.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    @staticmethod
+    def record(request, response, recorder, started):
+        """
+        Add the request to the registry and return its duration.
+        """
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        registry.record(match.view_name if match else UNMATCHED_ROUTE,
+                        request.method, response.status_code, duration,
+                        recorder)
+        return duration
+
+    def stream(self, content, request, response, recorder, started):
+        """
+        Yield the streaming content, recording its queries, and add
+        the request to the registry when the content is closed.
+        """
+        try:
+            with self.capture(recorder):
+                yield from content
+        finally:
+            self.record(request, response, recorder, started)
@@ -1,5 +1,84 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def cached_count(queryset):
+    """
+    Count the queryset without its selected annotations, reusing
+    the result for PAGINATION_COUNT_CACHE_TIMEOUT seconds if it is set.
+    """
+    queryset = queryset.values('pk')
+    if not settings.PAGINATION_COUNT_CACHE_TIMEOUT:
+        return queryset.count()
+    key = 'count:{}'.format(
+        hashlib.sha1(str(queryset.query).encode()).hexdigest())
+    return cache.get_or_set(
+        key, queryset.count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+
+
+class CachedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class LimitCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the view's cursor_ordering, newest
+    recipes first by default.
+    """
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
 
 
 class PageNumberAndLimitPagination(PageNumberPagination):
+    """
+    Page number pagination switching to cursor pagination when
+    the request passes a cursor or pagination=cursor.
+    """
+
     page_size_query_param = 'limit'
+    django_paginator_class = CachedCountPaginator
+    cursor_pagination_class = LimitCursorPagination
+
+    def use_cursor(self, queryset, request):
+        """
+        Check whether the request asks for cursor pagination and
+        the queryset has no ranking of its own, e.g. by search rank,
+        which keyset pagination on the view's cursor_ordering would
+        replace. Ranked querysets keep page numbers.
+        """
+        return ((self.cursor_pagination_class.cursor_query_param
+                 in request.query_params
+                 or request.query_params.get('pagination') == 'cursor')
+                and not queryset.query.order_by)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_pagination = None
+        if self.use_cursor(queryset, request):
+            self.cursor_pagination = self.cursor_pagination_class()
+            self.count = (cached_count(queryset)
+                          if request.query_params.get('count') == 'true'
+                          else None)
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is None:
+            return super().get_paginated_response(data)
+        response = self.cursor_pagination.get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+            response.data.move_to_end('count', last=False)
+        return response
@@ -0,0 +1,124 @@
+import csv
+import json
+from itertools import groupby
+
+from rest_framework.renderers import BaseRenderer
+
+from . import constants
+
+
+def convert_unit(unit):
+    """
+    Return the base unit of a measurement unit and its factor.
+    """
+    return constants.UNIT_CONVERSIONS.get(unit, (unit, 1))
+
+
+def merge_measurement_units(items):
+    """
+    Merge consecutive rows of the same ingredient whose measurement
+    units convert to a common base unit, e.g. kilograms into grams.
+    Units are only converted when the ingredient is listed in more
+    than one unit of the same base unit.
+    """
+    for name, rows in groupby(items, key=lambda item: item.get(
+            'ingredient__name')):
+        rows = [(row.get('ingredient__measurement_unit'),
+                 row.get('ingredient_total')) for row in rows]
+        units = {}
+        for unit, _ in rows:
+            units.setdefault(convert_unit(unit)[0], set()).add(unit)
+        totals = {}
+        for unit, total in rows:
+            base_unit, factor = convert_unit(unit)
+            if len(units[base_unit]) == 1:
+                base_unit, factor = unit, 1
+            totals[base_unit] = totals.get(base_unit, 0) + total * factor
+        for unit, total in totals.items():
+            yield name, unit, total
+
+
+class Echo:
+    """
+    File-like object returning what is written to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    """
+    Base renderer streaming shopping cart rows chunk by chunk.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render error responses of the download endpoint.
+        """
+        if isinstance(data, dict):
+            data = data.get('detail', data)
+        return str(data).encode(self.charset)
+
+    def stream(self, items):
+        """
+        Yield encoded chunks for the shopping cart rows.
+        """
+        for chunk in self.render_rows(merge_measurement_units(items)):
+            yield chunk.encode(self.charset)
+
+    def render_rows(self, rows):
+        raise NotImplementedError(
+            'ShoppingCartRenderer.render_rows() must be implemented.')
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def render_rows(self, rows):
+        for name, unit, total in rows:
+            yield f'- {name} ({unit}) — {total}\n'
+
+
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_rows(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class JSONShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+    def render_rows(self, rows):
+        separator = '['
+        for name, unit, total in rows:
+            yield separator + json.dumps(
+                {'name': name, 'measurement_unit': unit, 'amount': total},
+                ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    Render metrics in the Prometheus text exposition format.
+    """
+
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return '\n'.join(str(value) for value in data.values())
+        return data
@@ -0,0 +1,180 @@
+import bisect
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections
+from django.db.models import F, Q
+
+from . import constants
+from .cache import get_generation
+from recipes.models import Ingredient, Recipe
+
+SQLITE_SEARCH_TABLE = f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {constants.RECIPE_SEARCH_TABLE}
+    USING fts5(name, text, content='recipes_recipe', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2')
+'''
+SQLITE_SEARCH_TRIGGERS = {
+    f'{constants.RECIPE_SEARCH_TABLE}_insert': f'''
+        AFTER INSERT ON recipes_recipe BEGIN
+            INSERT INTO {constants.RECIPE_SEARCH_TABLE} (rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+    ''',
+    f'{constants.RECIPE_SEARCH_TABLE}_delete': f'''
+        AFTER DELETE ON recipes_recipe BEGIN
+            INSERT INTO {constants.RECIPE_SEARCH_TABLE}
+                ({constants.RECIPE_SEARCH_TABLE}, rowid, name, text)
+            VALUES ('delete', old.id, old.name, old.text);
+        END
+    ''',
+    f'{constants.RECIPE_SEARCH_TABLE}_update': f'''
+        AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+            INSERT INTO {constants.RECIPE_SEARCH_TABLE}
+                ({constants.RECIPE_SEARCH_TABLE}, rowid, name, text)
+            VALUES ('delete', old.id, old.name, old.text);
+            INSERT INTO {constants.RECIPE_SEARCH_TABLE} (rowid, name, text)
+            VALUES (new.id, new.name, new.text);
+        END
+    ''',
+}
+
+
+class IngredientIndex:
+    """
+    Process-local index of ingredients sorted by casefolded name.
+
+    The index is built lazily on the first search and rebuilt when
+    the ingredient cache generation changes or after
+    ``INGREDIENT_INDEX_TTL`` seconds to pick up writes made
+    by other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None
+        self._items = None
+        self._built_at = None
+        self._generation = None
+
+    def _load(self):
+        """
+        Return the sorted keys and items, building them if needed.
+        """
+        generation = get_generation(Ingredient)
+        with self._lock:
+            if (self._generation != generation
+                    or time.monotonic() - self._built_at
+                    > settings.INGREDIENT_INDEX_TTL):
+                entries = sorted(
+                    (name.casefold(), name, pk, measurement_unit)
+                    for pk, name, measurement_unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit').iterator()
+                )
+                self._keys = [entry[0] for entry in entries]
+                self._items = [
+                    {'id': pk, 'name': name,
+                     'measurement_unit': measurement_unit}
+                    for _, name, pk, measurement_unit in entries
+                ]
+                self._built_at = time.monotonic()
+                self._generation = generation
+            return self._keys, self._items
+
+    def search(self, query, limit=None):
+        """
+        Find ingredients whose name starts with the query, followed
+        by those that contain it elsewhere in the name.
+        """
+        if limit is None:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        keys, items = self._load()
+        query = query.casefold()
+        start = bisect.bisect_left(keys, query)
+        end = start
+        while (end < len(keys) and end - start < limit
+               and keys[end].startswith(query)):
+            end += 1
+        results = items[start:end]
+        if query:
+            for key, item in zip(keys, items):
+                if len(results) >= limit:
+                    break
+                if query in key and not key.startswith(query):
+                    results.append(item)
+        return results
+
+
+ingredient_index = IngredientIndex()
+
+
+def install_sqlite_search(using):
+    """
+    Create the SQLite FTS5 recipe search table and the triggers
+    keeping it in sync, rebuilding the index if any were missing.
+
+    Runs after every migrate, since SQLite recreates a table to
+    add a column and drops its triggers on the way.
+    """
+    database = connections[using]
+    if database.vendor != 'sqlite':
+        return
+    with database.cursor() as cursor:
+        if (Recipe._meta.db_table
+                not in database.introspection.table_names(cursor)):
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', (Recipe._meta.db_table,))
+        missing = SQLITE_SEARCH_TRIGGERS.keys() - {
+            name for name, in cursor.fetchall()}
+        if not missing:
+            return
+        cursor.execute(SQLITE_SEARCH_TABLE)
+        for name in missing:
+            cursor.execute(
+                f'CREATE TRIGGER {name} {SQLITE_SEARCH_TRIGGERS[name]}')
+        cursor.execute(
+            f'INSERT INTO {constants.RECIPE_SEARCH_TABLE} '
+            f"({constants.RECIPE_SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def sqlite_match_query(query):
+    """
+    Build an FTS5 query matching every word of the query as
+    a prefix, quoting the words so their syntax is not interpreted.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def search_recipes(queryset, query):
+    """
+    Filter recipes by a full-text query over name and text, best
+    matches first.
+
+    Uses the trigger-maintained tsvector column on PostgreSQL and
+    the FTS5 table on SQLite, falling back to icontains elsewhere.
+    """
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=constants.SEARCH_CONFIG,
+                                   search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-pub_date')
+    if connection.vendor == 'sqlite':
+        match = sqlite_match_query(query)
+        if not match:
+            return queryset.none()
+        table = constants.RECIPE_SEARCH_TABLE
+        return queryset.extra(
+            select={'rank': f'-bm25({table}, 10.0, 1.0)'},
+            tables=(table,),
+            where=(f'{table}.rowid = {Recipe._meta.db_table}.id',
+                   f'{table} MATCH %s'),
+            params=(match,),
+        ).order_by('-rank', '-pub_date')
+    return queryset.filter(Q(name__icontains=query) | Q(text__icontains=query))
@@ -1,17 +1,71 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from rest_framework.serializers import (IntegerField, ModelSerializer,
+from rest_framework.serializers import (CharField, FloatField, IntegerField,
+                                        ListField, ListSerializer,
+                                        ModelSerializer,
                                         PrimaryKeyRelatedField, ReadOnlyField,
-                                        SerializerMethodField, ValidationError)
-
-from . import constants, fields
-from recipes.constants import ALREADY_FOLLOW
-from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
-                            Recipe, ShoppingCart, Tag)
+                                        Serializer, SerializerMethodField,
+                                        ValidationError)
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import constants, fields, images
+from .authentication import deny_session, is_denied, load_user
+from .membership import FAVORITES, SHOPPING_CART, SUBSCRIPTIONS, get_membership
+from recipes.counters import update_counter
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from recipes.shopping_cart import apply_recipe_deltas
 
 User = get_user_model()
 
 
+def select_fields(query_params, names, default=None):
+    """
+    Return the field names requested with the fields query parameter,
+    or the default ones (all if there is no default), except those
+    excluded with omit, in the order of names.
+    """
+    requested, omitted = (
+        {name for name in query_params.get(param, '').split(',') if name}
+        for param in ('fields', 'omit')
+    )
+    unknown = (requested | omitted) - set(names)
+    if unknown:
+        raise ValidationError(constants.ERROR_UNKNOWN_FIELDS.format(
+            ', '.join(sorted(unknown))))
+    selected = requested or set(default or names)
+    return tuple(name for name in names
+                 if name in selected and name not in omitted)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin limiting the representation to the fields
+    requested with the fields and omit query parameters, so that
+    fields left out cost no queries. It only applies to top-level
+    serializers used for output, with the default fields taken from
+    the default_fields context item.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (request is None or hasattr(self.root, 'initial_data')
+                or not (self.root is self
+                        or (self.parent is self.root
+                            and isinstance(self.root, ListSerializer)))):
+            return fields
+        return {name: fields[name] for name in select_fields(
+            request.query_params, tuple(fields),
+            self.context.get('default_fields'))}
+
+
 class UserCreateSerializer(UserCreateSerializer):
     """
     Custom user creation serializer.
@@ -29,7 +83,7 @@ class UserCreateSerializer(UserCreateSerializer):
         )
 
 
-class UserSerializer(UserSerializer):
+class UserSerializer(SparseFieldsMixin, UserSerializer):
     """
     Custom user serializer.
     """
@@ -51,10 +105,8 @@ class UserSerializer(UserSerializer):
         """
         Check if the requesting user is subscribed to the author.
         """
-        user = self.context.get('request').user
-        return (user
-                and user.is_authenticated
-                and author.following.filter(user=user).exists())
+        return get_membership(self.context.get('request')).contains(
+            SUBSCRIPTIONS, author.id)
 
 
 class TagSerializer(ModelSerializer):
@@ -89,11 +141,6 @@ class IngredientAmountSerializer(ModelSerializer):
         model = IngredientAmount
         fields = ('id', 'amount')
 
-    def validate_id(self, id):
-        if not Ingredient.objects.filter(pk=id).exists():
-            raise ValidationError(constants.ERROR_NO_INGREDIENT_ID)
-        return id
-
 
 class IngredientRecipeSerializer(ModelSerializer):
     """
@@ -119,7 +166,7 @@ class SimpleRecipeSerializer(ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class RecipeSerializer(ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, ModelSerializer):
     """
     Serializer for recipe representation.
     """
@@ -131,6 +178,7 @@ class RecipeSerializer(ModelSerializer):
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
     image = fields.Base64ImageField()
+    image_variants = SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -143,6 +191,7 @@ class RecipeSerializer(ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         )
@@ -151,19 +200,36 @@ class RecipeSerializer(ModelSerializer):
         """
         Check if the requesting user has favorited the recipe.
         """
-        user = self.context.get('request').user
-        return (user
-                and user.is_authenticated
-                and recipe.favorites.filter(user=user).exists())
+        return get_membership(self.context.get('request')).contains(
+            FAVORITES, recipe.id)
+
+    def get_image_variants(self, recipe):
+        """
+        Get URLs of the downscaled image variants.
+        """
+        request = self.context.get('request')
+        return {variant: request.build_absolute_uri(url)
+                for variant, url in images.variant_urls(
+                    recipe.image.name).items()}
 
     def get_is_in_shopping_cart(self, recipe):
         """
         Check if the recipe is in the requesting user's shopping cart.
         """
-        user = self.context.get('request').user
-        return (user
-                and user.is_authenticated
-                and recipe.cart_items.filter(user=user).exists())
+        return get_membership(self.context.get('request')).contains(
+            SHOPPING_CART, recipe.id)
+
+
+class CookableRecipeSerializer(RecipeSerializer):
+    """
+    Serializer for recipes found by the user's ingredients.
+    """
+
+    coverage = FloatField(read_only=True)
+    missing = IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('coverage', 'missing')
 
 
 class RecipeCreateSerializer(ModelSerializer):
@@ -192,23 +258,38 @@ class RecipeCreateSerializer(ModelSerializer):
     def validate(self, data):
         """
         Validate recipe data.
+
+        Partial updates only validate the nested fields they contain.
+        """
+        if not self.partial or 'ingredients' in data:
+            self.validate_ingredient_list(data.get('ingredients'))
+        if not self.partial or 'tags' in data:
+            tags = data.get('tags')
+            if not tags:
+                raise ValidationError({'tags': constants.ERROR_NO_TAGS})
+            if len(set(tags)) != len(tags):
+                raise ValidationError(
+                    {'tags': constants.ERROR_DUPLICATE_TAGS})
+        return data
+
+    def validate_ingredient_list(self, ingredients):
+        """
+        Validate that ingredients are present, unique and exist.
         """
-        ingredients = data.get('ingredients')
         if not ingredients:
             raise ValidationError(constants.ERROR_NO_INGREDIENT)
-        ids = tuple(ingredient.get('id') for ingredient in ingredients)
-        unique_ids = set(ids)
-        if len(unique_ids) != len(ids):
+        ids = Counter(ingredient.get('id') for ingredient in ingredients)
+        duplicates = [id for id, count in ids.items() if count > 1]
+        if duplicates:
             raise ValidationError(
                 constants.ERROR_DUPLICATE_INGREDIENT.format(
-                    (id for id in unique_ids if ids.count(id) > 1)))
-
-        tags = data.get('tags')
-        if not tags:
-            raise ValidationError({'tags': constants.ERROR_NO_TAGS})
-        if len(set(tags)) != len(tags):
-            raise ValidationError({'tags': constants.ERROR_DUPLICATE_TAGS})
-        return data
+                    ', '.join(map(str, duplicates))))
+        missing = ids.keys() - set(Ingredient.objects.filter(
+            pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            raise ValidationError({'ingredients': (
+                constants.ERROR_INGREDIENT_DB.format(
+                    ', '.join(map(str, sorted(missing)))))})
 
     def create_ingredient_amount(self, ingredients, recipe):
         """
@@ -216,11 +297,23 @@ class RecipeCreateSerializer(ModelSerializer):
         """
         IngredientAmount.objects.bulk_create(
             IngredientAmount(
-                ingredient=Ingredient.objects.get(pk=ingredient.get('id')),
+                ingredient_id=ingredient.get('id'),
                 recipe=recipe,
                 amount=ingredient.get('amount')
             ) for ingredient in ingredients
         )
+        update_counter(Recipe, (recipe.pk,), 'ingredients_count',
+                       len(ingredients))
+
+    def save(self, **kwargs):
+        """
+        Store a newly uploaded image only once the request is valid,
+        so rejected requests leave no files behind.
+        """
+        image = self.validated_data.get('image')
+        if isinstance(image, images.PendingUpload):
+            self.validated_data['image'] = image.store()
+        return super().save(**kwargs)
 
     def create(self, validated_data):
         """
@@ -234,17 +327,65 @@ class RecipeCreateSerializer(ModelSerializer):
         self.create_ingredient_amount(ingredients, recipe)
         return recipe
 
+    def update_tags(self, tags, recipe):
+        """
+        Add and remove only the tags that changed.
+        """
+        current = {tag.pk for tag in recipe.tags.all()}
+        incoming = {tag.pk for tag in tags}
+        if current - incoming:
+            recipe.tags.remove(*(current - incoming))
+        if incoming - current:
+            recipe.tags.add(*(incoming - current))
+
+    def update_ingredient_amounts(self, ingredients, recipe):
+        """
+        Delete, update and create only the ingredient amounts
+        that changed.
+        """
+        current = {amount.ingredient_id: amount
+                   for amount in recipe.ingredient_amounts.all()}
+        incoming = {ingredient.get('id'): ingredient.get('amount')
+                    for ingredient in ingredients}
+        deltas = dict(incoming)
+        for id, amount in current.items():
+            deltas[id] = deltas.get(id, 0) - amount.amount
+        removed = current.keys() - incoming.keys()
+        if removed:
+            recipe.ingredient_amounts.filter(
+                ingredient_id__in=removed).delete()
+        changed = []
+        for id, amount in current.items():
+            if id in incoming and amount.amount != incoming[id]:
+                amount.amount = incoming[id]
+                changed.append(amount)
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ('amount',))
+        added = [ingredient for ingredient in ingredients
+                 if ingredient.get('id') not in current]
+        if added:
+            self.create_ingredient_amount(added, recipe)
+        apply_recipe_deltas(recipe, deltas)
+
+    @transaction.atomic
     def update(self, recipe, validated_data):
         """
-        Update an existing recipe.
+        Update an existing recipe, leaving omitted tags and
+        ingredients untouched.
+
+        Only the given fields are saved, so the counters maintained
+        in the database are not overwritten with stale values.
         """
-        tags = validated_data.pop('tags')
-        recipe.tags.clear()
-        recipe.tags.set(tags)
-        ingredients = validated_data.pop('ingredients')
-        recipe.ingredients.clear()
-        self.create_ingredient_amount(ingredients, recipe)
-        return super().update(recipe, validated_data)
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            self.update_tags(tags, recipe)
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            self.update_ingredient_amounts(ingredients, recipe)
+        for field, value in validated_data.items():
+            setattr(recipe, field, value)
+        recipe.save(update_fields=validated_data)
+        return recipe
 
     def to_representation(self, recipe):
         """
@@ -256,38 +397,13 @@ class RecipeCreateSerializer(ModelSerializer):
         ).data
 
 
-class FollowCreateSerializer(ModelSerializer):
-    """
-    Serializer for creating user follows.
-    """
-
-    class Meta:
-        model = Follow
-        fields = '__all__'
-
-    def validate(self, data):
-        """
-        Validate follow data.
-        """
-        author = data.get('author')
-        user = data.get('user')
-        if Follow.objects.filter(user=user, author=author).exists():
-            raise ValidationError(ALREADY_FOLLOW)
-        if user == author:
-            raise ValidationError(constants.ERROR_FOLLOW)
-        return data
-
-    def to_representation(self, instance):
-        return FollowSerializer(instance.author, context=self.context).data
-
-
 class FollowSerializer(UserSerializer):
     """
     Serializer for user follows.
     """
 
     recipes = SerializerMethodField()
-    recipes_count = ReadOnlyField(source='recipes.count')
+    recipes_count = ReadOnlyField()
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ('recipes', 'recipes_count',)
@@ -297,10 +413,13 @@ class FollowSerializer(UserSerializer):
         Get recipes authored by the user.
         """
         request = self.context.get('request')
-        recipes = author.recipes.all()
-        limit = request.query_params.get('recipes_limit')
-        if limit and limit.isdigit():
-            recipes = recipes[:int(limit)]
+        if hasattr(author, 'limited_recipes'):
+            recipes = author.limited_recipes
+        else:
+            recipes = author.recipes.all()
+            limit = request.query_params.get('recipes_limit')
+            if limit and limit.isdigit():
+                recipes = recipes[:int(limit)]
         return SimpleRecipeSerializer(
             recipes,
             many=True,
@@ -308,31 +427,65 @@ class FollowSerializer(UserSerializer):
         ).data
 
 
-class FavoriteSerializer(ModelSerializer):
+class RecipeIdsSerializer(Serializer):
     """
-    Serializer for favorites.
+    Serializer for recipe IDs of bulk favorites and shopping cart
+    changes.
     """
 
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
+    recipes = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=constants.BULK_RECIPES_MAX
+    )
 
-    def validate(self, data):
-        if self.Meta.model.objects.filter(
-            user=data.get('user'), recipe=data.get('recipe')
-        ).exists():
-            raise ValidationError(constants.RECIPE_ALREADY_IN_LIST.format(
-                self.Meta.model._meta.verbose_name))
-        return super().validate(data)
+    def validate_recipes(self, recipes):
+        """
+        Drop repeated IDs, keeping their order.
+        """
+        return list(dict.fromkeys(recipes))
 
-    def to_representation(self, instance):
-        return SimpleRecipeSerializer(instance.recipe).data
 
+class JWTObtainSerializer(TokenObtainPairSerializer):
+    """
+    Serializer issuing a refresh and an access token, which carry
+    the staff flag and the session ID used for revocation.
+    """
 
-class ShoppingCartSerializer(FavoriteSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[constants.JWT_STAFF_CLAIM] = user.is_staff
+        token[constants.JWT_SESSION_CLAIM] = token[api_settings.JTI_CLAIM]
+        return token
+
+
+class JWTRefreshSerializer(TokenRefreshSerializer):
+    """
+    Serializer issuing access tokens for refresh tokens that were
+    not revoked. The user is re-read on every refresh, so inactive
+    users get no new tokens and the staff flag follows the database.
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if is_denied(refresh):
+            raise TokenError(constants.ERROR_TOKEN_REVOKED)
+        if api_settings.USER_ID_CLAIM not in refresh:
+            raise TokenError(constants.ERROR_TOKEN_NO_USER)
+        user = load_user(refresh[api_settings.USER_ID_CLAIM])
+        access = refresh.access_token
+        access[constants.JWT_STAFF_CLAIM] = user.is_staff
+        return {'access': str(access)}
+
+
+class JWTLogoutSerializer(Serializer):
     """
-    Serializer for shopping cart items.
+    Serializer revoking a refresh token with its access tokens.
     """
 
-    class Meta(FavoriteSerializer.Meta):
-        model = ShoppingCart
+    refresh = CharField()
+
+    def validate(self, attrs):
+        deny_session(RefreshToken(attrs['refresh']))
+        return {}
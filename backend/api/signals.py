@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .cache import bump_generation
+from .membership import (FAVORITES, SHOPPING_CART, SUBSCRIPTIONS,
+                         invalidate_membership)
+from .search import install_sqlite_search
+from recipes.models import Favorite, Follow, Ingredient, ShoppingCart, Tag
+
+MEMBERSHIP_KINDS = {
+    Favorite: FAVORITES,
+    ShoppingCart: SHOPPING_CART,
+    Follow: SUBSCRIPTIONS,
+}
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_reference_generation(sender, **kwargs):
+    """
+    Start a new cache generation when a tag or an ingredient changes.
+    """
+    bump_generation(sender)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Follow)
+def invalidate_user_membership(sender, instance, using, **kwargs):
+    """
+    Drop the cached membership of the user whose favorites,
+    shopping cart or subscriptions changed, once the change is
+    committed, so that concurrent reads cannot cache the old one.
+    """
+    kind, user_id = MEMBERSHIP_KINDS[sender], instance.user_id
+    transaction.on_commit(
+        lambda: invalidate_membership(kind, user_id), using=using)
+
+
+@receiver(post_migrate)
+def install_recipe_search(using, **kwargs):
+    install_sqlite_search(using)
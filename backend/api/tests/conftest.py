@@ -0,0 +1,110 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, Tag, User)
+
+RECIPES_COUNT = 12
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_xdist_suffix,
+                                 tmp_path_factory):
+    """
+    Keep an SQLite test database in a file, so that threads of
+    concurrency tests share it without locking each other's tables.
+    """
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3')
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Start every test without cached memberships, counts and responses.
+    """
+    cache.clear()
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f'user{number}@example.com',
+        username=f'user{number}',
+        first_name='Name',
+        last_name='Surname',
+        password='Password123'
+    )
+
+
+@pytest.fixture
+def user(db):
+    return create_user(0)
+
+
+@pytest.fixture
+def authors(db):
+    return [create_user(number) for number in range(1, 4)]
+
+
+@pytest.fixture
+def tags(db):
+    return [Tag.objects.create(name=f'Tag {number}', slug=f'tag{number}',
+                               color=f'#00000{number}')
+            for number in range(3)]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (('Соль', 'г'), ('Сахар', 'г'),
+                               ('Молоко', 'мл'), ('Мука', 'кг'),
+                               ('Яйцо', 'шт'))]
+
+
+@pytest.fixture
+def recipes(authors, tags, ingredients):
+    recipes = []
+    for number in range(RECIPES_COUNT):
+        recipe = Recipe.objects.create(
+            author=authors[number % len(authors)],
+            name=f'Recipe {number}',
+            image=f'recipes/{number}.png',
+            text='Text',
+            cooking_time=number + 1,
+            ingredients_count=3
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe,
+                             ingredient=ingredients[(number + shift)
+                                                    % len(ingredients)],
+                             amount=shift + 1)
+            for shift in range(3)
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def user_lists(user, authors, recipes):
+    """
+    Give the user favorites, a shopping cart and subscriptions.
+    """
+    for recipe in recipes[::3]:
+        Favorite.objects.create(user=user, recipe=recipe)
+    for recipe in recipes[::4]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    for author in authors[:2]:
+        Follow.objects.create(user=user, author=author)
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -0,0 +1,116 @@
+from api import constants
+from api.tests.utils import cart_summary, cart_totals
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+MISSING_ID = 99999
+
+
+def favorites_counts(recipes):
+    return dict(Recipe.objects.filter(
+        pk__in=[recipe.pk for recipe in recipes]
+    ).values_list('pk', 'favorites_count'))
+
+
+def statuses(response):
+    return [(item['id'], item['status']) for item in response.data['recipes']]
+
+
+def test_bulk_favorite_add_reports_each_recipe(user, user_client, user_lists,
+                                               recipes):
+    # The user already has recipes 0, 3, 6 and 9 in favorites.
+    ids = [recipes[0].pk, recipes[1].pk, MISSING_ID, recipes[2].pk,
+           recipes[1].pk]
+    before = favorites_counts(recipes)
+    response = user_client.post('/api/recipes/favorite/bulk/',
+                                {'recipes': ids}, format='json')
+    assert response.status_code == 200
+    assert statuses(response) == [
+        (recipes[0].pk, constants.BULK_ALREADY_ADDED),
+        (recipes[1].pk, constants.BULK_ADDED),
+        (MISSING_ID, constants.BULK_NOT_FOUND),
+        (recipes[2].pk, constants.BULK_ADDED),
+    ]
+    added = {recipes[1].pk, recipes[2].pk}
+    assert favorites_counts(recipes) == {
+        pk: count + (pk in added) for pk, count in before.items()}
+    response = user_client.post('/api/recipes/favorite/bulk/',
+                                {'recipes': ids}, format='json')
+    assert {status for _, status in statuses(response)} == {
+        constants.BULK_ALREADY_ADDED, constants.BULK_NOT_FOUND}
+    assert favorites_counts(recipes) == {
+        pk: count + (pk in added) for pk, count in before.items()}
+
+
+def test_bulk_favorite_remove_reports_each_recipe(user, user_client,
+                                                  user_lists, recipes):
+    ids = [recipes[3].pk, recipes[4].pk, MISSING_ID]
+    before = favorites_counts(recipes)
+    response = user_client.delete('/api/recipes/favorite/bulk/',
+                                  {'recipes': ids}, format='json')
+    assert response.status_code == 200
+    assert statuses(response) == [
+        (recipes[3].pk, constants.BULK_REMOVED),
+        (recipes[4].pk, constants.BULK_NOT_IN_LIST),
+        (MISSING_ID, constants.BULK_NOT_FOUND),
+    ]
+    assert not Favorite.objects.filter(user=user, recipe=recipes[3]).exists()
+    assert favorites_counts(recipes) == {
+        pk: count - (pk == recipes[3].pk) for pk, count in before.items()}
+
+
+def test_bulk_cart_add_and_remove_keep_summary(user, user_client,
+                                               user_lists, recipes):
+    # The user already has recipes 0, 4 and 8 in the shopping cart.
+    response = user_client.post(
+        '/api/recipes/shopping_cart/bulk/',
+        {'recipes': [recipes[0].pk, recipes[1].pk, MISSING_ID]},
+        format='json'
+    )
+    assert statuses(response) == [
+        (recipes[0].pk, constants.BULK_ALREADY_ADDED),
+        (recipes[1].pk, constants.BULK_ADDED),
+        (MISSING_ID, constants.BULK_NOT_FOUND),
+    ]
+    assert cart_summary(user) == cart_totals(user)
+    response = user_client.delete(
+        '/api/recipes/shopping_cart/bulk/',
+        {'recipes': [recipes[1].pk, recipes[4].pk, recipes[2].pk]},
+        format='json'
+    )
+    assert statuses(response) == [
+        (recipes[1].pk, constants.BULK_REMOVED),
+        (recipes[4].pk, constants.BULK_REMOVED),
+        (recipes[2].pk, constants.BULK_NOT_IN_LIST),
+    ]
+    assert cart_summary(user) == cart_totals(user)
+
+
+def test_cart_from_favorites(user, user_client, user_lists, recipes):
+    response = user_client.post('/api/recipes/shopping_cart/from_favorites/')
+    assert response.status_code == 200
+    assert dict(statuses(response)) == {
+        recipes[0].pk: constants.BULK_ALREADY_ADDED,
+        recipes[3].pk: constants.BULK_ADDED,
+        recipes[6].pk: constants.BULK_ADDED,
+        recipes[9].pk: constants.BULK_ADDED,
+    }
+    assert set(ShoppingCart.objects.filter(user=user).values_list(
+        'recipe_id', flat=True)) == {
+            recipes[index].pk for index in (0, 3, 4, 6, 8, 9)}
+    assert cart_summary(user) == cart_totals(user)
+
+
+def test_clear_cart(user, user_client, user_lists):
+    response = user_client.delete('/api/recipes/shopping_cart/clear/')
+    assert response.status_code == 204
+    assert not ShoppingCart.objects.filter(user=user).exists()
+    assert cart_summary(user) == {}
+    response = user_client.delete('/api/recipes/shopping_cart/clear/')
+    assert response.status_code == 204
+
+
+def test_bulk_requests_are_validated(user_client):
+    for recipes in ([], ['abc']):
+        response = user_client.post('/api/recipes/favorite/bulk/',
+                                    {'recipes': recipes}, format='json')
+        assert response.status_code == 400
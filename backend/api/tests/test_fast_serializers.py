@@ -0,0 +1,91 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.fast_serializers import RowSerializer
+
+URLS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=5&page=2',
+    '/api/recipes/?fields=id,name,text,ingredients,author,tags',
+    '/api/recipes/?omit=author',
+    '/api/recipes/?fields=id',
+    '/api/recipes/?tags=tag1&is_favorited=1',
+    '/api/recipes/?search=Recipe',
+    '/api/recipes/?pagination=cursor&limit=5',
+    '/api/recipes/?author={author}',
+    '/api/recipes/{recipe}/',
+    '/api/recipes/{recipe}/?omit=ingredients',
+    '/api/recipes/99999/',
+    '/api/recipes/abc/',
+    '/api/tags/',
+    '/api/tags/{tag}/',
+    '/api/tags/99999/',
+    '/api/tags/abc/',
+    '/api/ingredients/',
+    '/api/ingredients/{ingredient}/',
+    '/api/ingredients/?name=Са',
+    '/api/ingredients/abc/',
+)
+SUBSCRIPTION_URLS = (
+    '/api/users/subscriptions/',
+    '/api/users/subscriptions/?recipes_limit=2',
+    '/api/users/subscriptions/?fields=id,recipes',
+    '/api/users/subscriptions/?limit=1&page=2',
+    '/api/users/subscriptions/?pagination=cursor&limit=1&fields=id',
+)
+
+
+def fetch(client, url, settings, fast):
+    cache.clear()
+    settings.FAST_SERIALIZERS_ENABLED = fast
+    response = client.get(url)
+    return response.status_code, response.content
+
+
+@pytest.fixture
+def format_url(authors, recipes, tags, ingredients):
+    def format_url(url):
+        return url.format(author=authors[0].pk, recipe=recipes[0].pk,
+                          tag=tags[0].pk, ingredient=ingredients[0].pk)
+    return format_url
+
+
+@pytest.mark.parametrize('url', URLS + SUBSCRIPTION_URLS)
+def test_fast_responses_match_drf(user_client, user_lists, format_url,
+                                  settings, url):
+    url = format_url(url)
+    assert (fetch(user_client, url, settings, True)
+            == fetch(user_client, url, settings, False))
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_anonymous_fast_responses_match_drf(recipes, format_url, settings,
+                                            url):
+    url = format_url(url)
+    client = APIClient()
+    assert (fetch(client, url, settings, True)
+            == fetch(client, url, settings, False))
+
+
+def test_next_cursor_page_matches_drf(user_client, recipes, settings):
+    url = user_client.get(
+        '/api/recipes/?pagination=cursor&limit=5').data['next']
+    assert (fetch(user_client, url, settings, True)
+            == fetch(user_client, url, settings, False))
+
+
+@pytest.mark.parametrize('url', (
+    '/api/recipes/', '/api/recipes/{recipe}/', '/api/users/subscriptions/',
+))
+def test_fast_serializers_serve_hot_endpoints(user_client, user_lists,
+                                              format_url, url):
+    with mock.patch.object(
+        RowSerializer, 'to_representation', autospec=True,
+        side_effect=RowSerializer.to_representation
+    ) as to_representation:
+        response = user_client.get(format_url(url))
+    assert response.status_code == 200
+    to_representation.assert_called()
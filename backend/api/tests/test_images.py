@@ -0,0 +1,71 @@
+import base64
+import io
+import logging
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+from api import constants, images
+
+
+def image_data(size, mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def recipe_data(tags, ingredients):
+    return {
+        'tags': [tags[0].pk],
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        'name': 'Recipe',
+        'text': 'Text',
+        'cooking_time': 5,
+    }
+
+
+@pytest.mark.parametrize('image, error', (
+    # Over Pillow's decompression bomb limit, yet a small file.
+    (image_data((14000, 14000), mode='1'), constants.ERROR_IMAGE_INVALID),
+    (image_data((5000, 10)), constants.ERROR_IMAGE_DIMENSIONS.format(
+        constants.IMAGE_MAX_DIMENSION)),
+    ('data:image/png;base64,AAAA', constants.ERROR_IMAGE_INVALID),
+))
+def test_invalid_images_are_rejected(user_client, recipe_data, media_root,
+                                     image, error):
+    response = user_client.post('/api/recipes/',
+                                {**recipe_data, 'image': image},
+                                format='json')
+    assert response.status_code == 400
+    assert response.data['image'] == [error]
+    assert not any(media_root.iterdir())
+
+
+def test_rejected_request_stores_no_image(user_client, recipe_data,
+                                          media_root):
+    response = user_client.post(
+        '/api/recipes/',
+        {**recipe_data, 'tags': [], 'image': image_data((20, 10))},
+        format='json'
+    )
+    assert response.status_code == 400
+    assert not any(media_root.iterdir())
+
+
+def test_background_errors_are_logged(monkeypatch, caplog):
+    failed = Future()
+    failed.set_exception(OSError('Disk full'))
+    monkeypatch.setattr(images.executor, 'submit',
+                        lambda function, *args: failed)
+    with caplog.at_level(logging.ERROR, logger=images.logger.name):
+        images.schedule(images.restore_variants, 'digest')
+    assert 'Disk full' in caplog.text
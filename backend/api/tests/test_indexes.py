@@ -0,0 +1,32 @@
+import pytest
+from django.db import connection
+
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql',
+                                reason='Query plans are PostgreSQL ones.')
+
+
+@pytest.fixture
+def index_scans(recipes):
+    """
+    Make the planner prefer index scans, as it would on a full table
+    rather than on the few test rows.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+def test_author_feed_uses_author_index(index_scans, authors):
+    plan = Recipe.objects.filter(
+        author=authors[0]).order_by('-pub_date')[:6].explain()
+    assert 'recipe_author_pub_date_idx' in plan
+
+
+def test_recipe_page_uses_pub_date_index(index_scans, recipes):
+    plan = Recipe.objects.order_by('-pub_date', '-id')[:6].explain()
+    assert 'recipe_pub_date_id_idx' in plan
+    plan = Recipe.objects.filter(
+        pub_date__lt=recipes[-1].pub_date
+    ).order_by('-pub_date', '-id')[:6].explain()
+    assert 'recipe_pub_date_id_idx' in plan
@@ -0,0 +1,115 @@
+import importlib
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+from foodgram_backend import urls as root_urls
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import constants, urls
+from api.authentication import StatelessJWTAuthentication
+
+PASSWORD = 'Password123'
+
+
+def reload_urls():
+    importlib.reload(urls)
+    # The root URLconf holds a resolver caching the old API patterns.
+    importlib.reload(root_urls)
+    clear_url_caches()
+
+
+@pytest.fixture(autouse=True)
+def jwt_auth(settings, monkeypatch):
+    """
+    Turn the JWT mode on, which settings only read on start up.
+    """
+    enabled = settings.JWT_AUTH_ENABLED
+    settings.JWT_AUTH_ENABLED = True
+    monkeypatch.setattr(APIView, 'authentication_classes', (
+        StatelessJWTAuthentication, *APIView.authentication_classes))
+    reload_urls()
+    yield
+    settings.JWT_AUTH_ENABLED = enabled
+    reload_urls()
+
+
+def obtain_tokens(user):
+    response = APIClient().post('/api/auth/jwt/create/',
+                                {'email': user.email, 'password': PASSWORD})
+    assert response.status_code == 200
+    return response.data
+
+
+def bearer_client(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+def refresh(refresh_token):
+    return APIClient().post('/api/auth/jwt/refresh/',
+                            {'refresh': refresh_token})
+
+
+@pytest.mark.parametrize('url', (
+    '/api/recipes/?is_favorited=1&fields=id,name',
+    '/api/recipes/download_shopping_cart/',
+))
+def test_access_token_needs_no_user_query(user, user_lists, url):
+    client = bearer_client(obtain_tokens(user)['access'])
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+    assert not any('"recipes_user"' in query['sql']
+                   for query in context.captured_queries)
+
+
+def test_refresh_rereads_user(user):
+    user.is_staff = True
+    user.save()
+    tokens = obtain_tokens(user)
+    assert AccessToken(tokens['access'])[constants.JWT_STAFF_CLAIM] is True
+    user.is_staff = False
+    user.save()
+    response = refresh(tokens['refresh'])
+    assert response.status_code == 200
+    assert AccessToken(
+        response.data['access'])[constants.JWT_STAFF_CLAIM] is False
+    user.is_active = False
+    user.save()
+    assert refresh(tokens['refresh']).status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(user):
+    tokens = obtain_tokens(user)
+    client = bearer_client(tokens['access'])
+    assert client.get('/api/users/me/').status_code == 200
+    response = APIClient().post('/api/auth/jwt/logout/',
+                                {'refresh': tokens['refresh']})
+    assert response.status_code == 204
+    assert client.get('/api/users/me/').status_code == 401
+    assert refresh(tokens['refresh']).status_code == 401
+
+
+@pytest.mark.parametrize('url', (
+    '/api/auth/jwt/refresh/', '/api/auth/jwt/logout/',
+))
+def test_garbage_refresh_token_is_rejected(db, url):
+    response = APIClient().post(url, {'refresh': 'garbage'})
+    assert response.status_code == 401
+
+
+def test_legacy_token_auth_still_works(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+    response = client.get('/api/users/me/')
+    assert response.status_code == 200
+    assert response.data['email'] == user.email
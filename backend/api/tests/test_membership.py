@@ -0,0 +1,31 @@
+from django.core.cache import cache
+
+from api.membership import FAVORITES, SUBSCRIPTIONS, membership_key
+
+
+def test_membership_is_invalidated_on_commit(
+        user, user_client, recipes, django_capture_on_commit_callbacks):
+    url = f'/api/recipes/{recipes[0].pk}/'
+    assert user_client.get(url).data['is_favorited'] is False
+    key = membership_key(FAVORITES, user.pk)
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = user_client.post(f'{url}favorite/')
+        assert response.status_code == 201
+        # Until the change is committed, concurrent reads may still
+        # cache the old membership, so it is only dropped afterwards.
+        assert cache.get(key) is not None
+    for callback in callbacks:
+        callback()
+    assert cache.get(key) is None
+    assert user_client.get(url).data['is_favorited'] is True
+
+
+def test_subscription_is_visible_after_commit(
+        user, user_client, authors, django_capture_on_commit_callbacks):
+    url = f'/api/users/{authors[0].pk}/'
+    assert user_client.get(url).data['is_subscribed'] is False
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(f'{url}subscribe/')
+    assert response.status_code == 201
+    assert cache.get(membership_key(SUBSCRIPTIONS, user.pk)) is None
+    assert user_client.get(url).data['is_subscribed'] is True
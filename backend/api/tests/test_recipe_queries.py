@@ -0,0 +1,37 @@
+import pytest
+
+from api.serializers import RecipeSerializer
+
+ALL_FIELDS = ','.join(RecipeSerializer.Meta.fields)
+
+
+@pytest.mark.parametrize('limit', (1, 6, 12))
+@pytest.mark.parametrize('fast, fields, queries', (
+    (True, None, 7),
+    (True, ALL_FIELDS, 8),
+    (False, None, 6),
+    (False, ALL_FIELDS, 7),
+))
+def test_recipe_list_queries(user_client, user_lists, settings,
+                             django_assert_num_queries,
+                             limit, fast, fields, queries):
+    settings.FAST_SERIALIZERS_ENABLED = fast
+    params = {'limit': limit}
+    if fields:
+        params['fields'] = fields
+    with django_assert_num_queries(queries):
+        response = user_client.get('/api/recipes/', params)
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+@pytest.mark.parametrize('index', (0, -1))
+@pytest.mark.parametrize('fast, queries', ((True, 7), (False, 6)))
+def test_recipe_detail_queries(user_client, user_lists, recipes, settings,
+                               django_assert_num_queries,
+                               index, fast, queries):
+    settings.FAST_SERIALIZERS_ENABLED = fast
+    with django_assert_num_queries(queries):
+        response = user_client.get(f'/api/recipes/{recipes[index].pk}/')
+    assert response.status_code == 200
+    assert response.data['id'] == recipes[index].pk
@@ -0,0 +1,60 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.tests.utils import cart_summary, cart_totals
+from recipes.models import ShoppingCartIngredient
+
+
+@pytest.fixture
+def author_client(recipes):
+    client = APIClient()
+    client.force_authenticate(recipes[0].author)
+    return client
+
+
+def test_cart_summary_follows_cart_changes(user, user_client, user_lists,
+                                           recipes):
+    assert cart_summary(user) == cart_totals(user)
+    response = user_client.post(f'/api/recipes/{recipes[1].pk}/shopping_cart/')
+    assert response.status_code == 201
+    assert cart_summary(user) == cart_totals(user)
+    response = user_client.delete(
+        f'/api/recipes/{recipes[0].pk}/shopping_cart/')
+    assert response.status_code == 204
+    assert cart_summary(user) == cart_totals(user)
+    response = user_client.delete('/api/recipes/shopping_cart/clear/')
+    assert response.status_code == 204
+    assert cart_summary(user) == {}
+
+
+def test_cart_summary_follows_recipe_edits(user, user_lists, recipes,
+                                           ingredients, author_client):
+    response = author_client.patch(
+        f'/api/recipes/{recipes[0].pk}/',
+        {'ingredients': [{'id': ingredients[0].pk, 'amount': 50},
+                         {'id': ingredients[4].pk, 'amount': 7}]},
+        format='json'
+    )
+    assert response.status_code == 200
+    assert cart_summary(user) == cart_totals(user)
+    assert cart_summary(user)[ingredients[4].pk] >= 7
+
+
+def test_cart_summary_follows_recipe_deletion(user, user_lists, recipes,
+                                              author_client):
+    response = author_client.delete(f'/api/recipes/{recipes[0].pk}/')
+    assert response.status_code == 204
+    assert cart_summary(user) == cart_totals(user)
+    recipes[4].delete()
+    assert cart_summary(user) == cart_totals(user)
+
+
+def test_download_reads_cart_summary(user, user_client, user_lists,
+                                     ingredients):
+    # Downloads read the stored summary instead of aggregating.
+    ShoppingCartIngredient.objects.filter(
+        user=user, ingredient=ingredients[0]).update(amount=999)
+    response = user_client.get('/api/recipes/download_shopping_cart/',
+                               HTTP_ACCEPT='application/json')
+    assert response.status_code == 200
+    assert '999' in b''.join(response.streaming_content).decode()
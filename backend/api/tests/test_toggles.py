@@ -0,0 +1,108 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, ShoppingCartIngredient, User)
+
+THREADS = 12
+
+
+class ConcurrentToggleTest(TransactionTestCase):
+    """
+    The same toggle sent from many threads at once succeeds exactly
+    once, the other requests are rejected and derived data stays
+    consistent.
+    """
+
+    def setUp(self):
+        self.user, self.author = (
+            User.objects.create_user(
+                email=f'{name}@example.com', username=name,
+                first_name='Name', last_name='Surname',
+                password='Password123')
+            for name in ('user', 'author'))
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Recipe', image='recipes/recipe.png',
+            text='Text', cooking_time=10)
+        IngredientAmount.objects.create(
+            recipe=self.recipe, amount=5,
+            ingredient=Ingredient.objects.create(
+                name='Соль', measurement_unit='г'))
+
+    def hammer(self, method, url):
+        """
+        Send the request from THREADS threads at once and return
+        the sorted status codes.
+        """
+        barrier = threading.Barrier(THREADS)
+        codes = []
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                codes.append(getattr(client, method)(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=send) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(codes)
+
+    def assert_toggled_once(self, codes, status):
+        self.assertEqual(codes, sorted([status] + [400] * (THREADS - 1)))
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        self.assert_toggled_once(self.hammer('post', url), 201)
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assert_toggled_once(self.hammer('delete', url), 204)
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        self.assert_toggled_once(self.hammer('post', url), 201)
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(list(ShoppingCartIngredient.objects.filter(
+            user=self.user).values_list('amount', flat=True)), [5])
+        self.assert_toggled_once(self.hammer('delete', url), 204)
+        self.assertFalse(
+            ShoppingCart.objects.filter(user=self.user).exists())
+        self.assertFalse(ShoppingCartIngredient.objects.filter(
+            user=self.user, amount__gt=0).exists())
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assert_toggled_once(self.hammer('post', url), 201)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        self.assert_toggled_once(self.hammer('delete', url), 204)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+    def test_malformed_id(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for method, url in (('post', '/api/recipes/abc/favorite/'),
+                            ('delete', '/api/recipes/abc/favorite/'),
+                            ('post', '/api/recipes/abc/shopping_cart/'),
+                            ('delete', '/api/recipes/abc/shopping_cart/'),
+                            ('post', '/api/users/abc/subscribe/'),
+                            ('delete', '/api/users/abc/subscribe/')):
+            with self.subTest(method=method, url=url):
+                self.assertEqual(
+                    getattr(client, method)(url).status_code, 404)
@@ -0,0 +1,22 @@
+from django.db.models import Sum
+
+from recipes.models import IngredientAmount, ShoppingCartIngredient
+
+
+def cart_summary(user):
+    """
+    Return the stored shopping cart summary of the user.
+    """
+    return dict(ShoppingCartIngredient.objects.filter(
+        user=user).values_list('ingredient_id', 'amount'))
+
+
+def cart_totals(user):
+    """
+    Aggregate the user's cart from scratch.
+    """
+    return dict(IngredientAmount.objects.filter(
+        recipe__cart_items__user=user
+    ).values('ingredient').annotate(
+        total=Sum('amount')
+    ).order_by().values_list('ingredient', 'total'))
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from .views import (IngredientViewSet, JWTCreateView, JWTLogoutView,
+                    JWTRefreshView, MetricsView, RecipeViewSet, TagViewSet,
+                    UserViewSet)
 
 app_name = 'api'
 
@@ -22,4 +25,13 @@ router.register('recipes',
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
+
+if settings.JWT_AUTH_ENABLED:
+    urlpatterns += [
+        path('auth/jwt/create/', JWTCreateView.as_view(), name='jwt-create'),
+        path('auth/jwt/refresh/', JWTRefreshView.as_view(),
+             name='jwt-refresh'),
+        path('auth/jwt/logout/', JWTLogoutView.as_view(), name='jwt-logout'),
+    ]
@@ -1,32 +1,58 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db.models import (Count, F, FloatField, OuterRef, Prefetch,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Greatest
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import (decorators, exceptions, permissions, status,
+from rest_framework import (decorators, exceptions, permissions, status, views,
                             viewsets)
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework_simplejwt import views as jwt_views
 
-from . import constants
+from . import constants, metrics, renderers
+from .cache import CachedResponseMixin
+from .fast_serializers import (FastFollowSerializer, FastRecipeSerializer,
+                               field_names, values)
 from .filters import IngredientFilter, RecipeFilter
+from .membership import FAVORITES, SHOPPING_CART, invalidate_membership
+from .paginations import LimitCursorPagination
 from .permissions import IsAuthorOrAdminOrReadOnly
-from .serializers import (FavoriteSerializer, FollowCreateSerializer,
-                          FollowSerializer, IngredientSerializer,
-                          RecipeCreateSerializer, RecipeSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+from .search import ingredient_index
+from .serializers import (CookableRecipeSerializer, FollowSerializer,
+                          IngredientSerializer, JWTLogoutSerializer,
+                          JWTObtainSerializer, JWTRefreshSerializer,
+                          RecipeCreateSerializer, RecipeIdsSerializer,
+                          RecipeSerializer, SimpleRecipeSerializer,
+                          SparseFieldsMixin, TagSerializer, select_fields)
+from recipes.constants import ALREADY_FOLLOW
 from recipes.models import (Favorite, Follow, Ingredient, IngredientAmount,
-                            Recipe, ShoppingCart, Tag)
+                            Recipe, ShoppingCart, ShoppingCartIngredient, Tag)
+from recipes.relations import add_recipes, link, remove_recipes, unlink
 
 User = get_user_model()
 
 
+def toggle(change, model, user_id, target, target_id):
+    """
+    Link or unlink the target, raising NotFound for a malformed
+    target ID like get_object_or_404 does.
+    """
+    try:
+        return change(model, user_id, target, target_id)
+    except (TypeError, ValueError):
+        raise exceptions.NotFound
+
+
 class UserViewSet(UserViewSet):
     """
     Custom user view set with additional actions.
     """
 
+    cursor_ordering = ('username',)
+
     @decorators.action(
         detail=False,
         methods=('get',),
@@ -51,18 +77,19 @@ class UserViewSet(UserViewSet):
         Subscribe or unsubscribe from another user.
         """
         user = request.user
-        author = get_object_or_404(User, pk=self.kwargs.get('id'))
+        author_id = self.kwargs.get('id')
         if request.method == 'POST':
-            serializer = FollowCreateSerializer(
-                data={'user': user.id, 'author': author.id},
-                context={'request': request}
+            author = get_object_or_404(User, pk=author_id)
+            if author.id == user.id:
+                raise exceptions.ValidationError(constants.ERROR_FOLLOW)
+            if not link(Follow, user.id, 'author', author.id):
+                raise exceptions.ValidationError(ALREADY_FOLLOW)
+            return Response(
+                FollowSerializer(author, context={'request': request}).data,
+                status=status.HTTP_201_CREATED
             )
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        try:
-            Follow.objects.get(user=user, author=author).delete()
-        except ObjectDoesNotExist:
+        if not toggle(unlink, Follow, user.id, 'author', author_id):
+            get_object_or_404(User, pk=author_id)
             raise exceptions.ValidationError(
                 constants.ERROR_DELETE_SUBSCRIPTION)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -76,16 +103,103 @@ class UserViewSet(UserViewSet):
         """
         List user's subscriptions.
         """
+        authors = User.objects.filter(following__user_id=request.user.id)
+        fields = select_fields(request.query_params,
+                               FollowSerializer.Meta.fields)
+        recipes = Recipe.objects.all()
+        limit = request.query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:int(limit)]
+            ))
+        if settings.FAST_SERIALIZERS_ENABLED:
+            serializer = FastFollowSerializer(request, fields, recipes)
+            return self.get_paginated_response(serializer.to_representation(
+                self.paginate_queryset(values(authors, (
+                    *serializer.get_columns(),
+                    *(field.lstrip('-') for field in self.cursor_ordering)
+                )))))
+        if 'recipes' in fields:
+            authors = authors.prefetch_related(Prefetch(
+                'recipes', queryset=recipes, to_attr='limited_recipes'))
         return self.get_paginated_response(
-            FollowSerializer(self.paginate_queryset(
-                User.objects.filter(following__user=request.user)),
+            FollowSerializer(
+                self.paginate_queryset(authors),
                 many=True,
                 context={'request': request}
             ).data
         )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class MetricsView(views.APIView):
+    """
+    Expose request and query metrics of this process to Prometheus.
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (renderers.PrometheusRenderer,)
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            raise exceptions.NotFound
+        return Response(metrics.registry.render(),
+                        content_type=constants.PROMETHEUS_CONTENT_TYPE)
+
+
+class JWTCreateView(jwt_views.TokenObtainPairView):
+    """
+    Log in with email and password, getting a refresh and an access
+    token.
+    """
+
+    serializer_class = JWTObtainSerializer
+
+
+class JWTRefreshView(jwt_views.TokenRefreshView):
+    """
+    Get a new access token for a refresh token.
+    """
+
+    serializer_class = JWTRefreshSerializer
+
+
+class JWTLogoutView(jwt_views.TokenViewBase):
+    """
+    Revoke a refresh token and the access tokens issued from it.
+    """
+
+    serializer_class = JWTLogoutSerializer
+
+    def post(self, request, *args, **kwargs):
+        super().post(request, *args, **kwargs)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ValuesReadMixin:
+    """
+    Serve lists and details of a read-only view set, whose serializer
+    only has model fields, straight from .values() rows.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS_ENABLED:
+            return super().list(request, *args, **kwargs)
+        return Response(list(self.filter_queryset(self.get_queryset()).values(
+            *field_names(self.serializer_class))))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS_ENABLED:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(get_object_or_404(
+            self.filter_queryset(self.get_queryset()).values(
+                *field_names(self.serializer_class)),
+            pk=kwargs['pk']))
+
+
+class TagViewSet(CachedResponseMixin, ValuesReadMixin,
+                 viewsets.ReadOnlyModelViewSet):
     """
     View set for tags.
     """
@@ -95,7 +209,8 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedResponseMixin, ValuesReadMixin,
+                        viewsets.ReadOnlyModelViewSet):
     """
     View set for ingredients.
     """
@@ -106,6 +221,16 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """
+        Serve name autocomplete from the in-memory ingredient index.
+        """
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            lambda: Response(ingredient_index.search(name)))
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """
@@ -118,11 +243,91 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ('get', 'post', 'delete', 'patch')
+    cursor_ordering = LimitCursorPagination.ordering
+
+    def get_queryset(self):
+        """
+        Load related objects up front, so serializers do not query
+        per recipe, skipping the ones of fields left out of
+        the response. The requesting user's flags come from
+        the membership cache.
+        """
+        recipes = Recipe.objects.all()
+        fields = self.get_response_fields()
+        if 'author' in fields:
+            recipes = recipes.select_related('author')
+        if 'tags' in fields:
+            recipes = recipes.prefetch_related('tags')
+        if 'ingredients' in fields:
+            recipes = recipes.prefetch_related(
+                Prefetch('ingredient_amounts',
+                         queryset=IngredientAmount.objects.select_related(
+                             'ingredient').order_by('pk')))
+        return recipes
+
+    def get_default_fields(self):
+        """
+        Represent listed recipes by what recipe cards show.
+        """
+        return constants.RECIPE_LIST_FIELDS if self.action == 'list' else None
+
+    def get_response_fields(self):
+        """
+        Get names of the recipe fields the response includes.
+        """
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsMixin):
+            return RecipeSerializer.Meta.fields
+        return select_fields(self.request.query_params,
+                             serializer_class.Meta.fields,
+                             self.get_default_fields())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['default_fields'] = self.get_default_fields()
+        return context
+
+    def use_fast_serializer(self):
+        return (settings.FAST_SERIALIZERS_ENABLED
+                and self.get_serializer_class() is RecipeSerializer)
+
+    def get_fast_queryset(self, serializer):
+        """
+        Get the filtered recipes as .values() rows with the columns
+        the fast-path serializer and cursor pagination need.
+        """
+        return values(self.filter_queryset(self.get_queryset()), (
+            *serializer.get_columns(),
+            *(field.lstrip('-') for field in self.cursor_ordering)))
+
+    def list(self, request, *args, **kwargs):
+        """
+        List recipes through the fast-path serializer.
+        """
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+        serializer = FastRecipeSerializer(
+            request, self.get_response_fields())
+        return self.get_paginated_response(serializer.to_representation(
+            self.paginate_queryset(self.get_fast_queryset(serializer))))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a recipe through the fast-path serializer.
+        """
+        if not self.use_fast_serializer():
+            return super().retrieve(request, *args, **kwargs)
+        serializer = FastRecipeSerializer(
+            request, self.get_response_fields())
+        return Response(serializer.to_representation([get_object_or_404(
+            self.get_fast_queryset(serializer), pk=kwargs['pk'])])[0])
 
     def get_serializer_class(self):
         """
         Use different serializer for creating and retrieving recipes.
         """
+        if self.action == 'cookable':
+            return CookableRecipeSerializer
         return (RecipeSerializer
                 if self.request.method in permissions.SAFE_METHODS
                 else RecipeCreateSerializer)
@@ -137,7 +342,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Add or remove a recipe from favorites.
         """
         if request.method == 'POST':
-            return self.add_to_list(FavoriteSerializer, request.user, pk)
+            return self.add_to_list(Favorite, request.user, pk)
         return self.remove_from_list(Favorite, request.user, pk)
 
     @decorators.action(
@@ -150,63 +355,236 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Add or remove a recipe from shopping cart.
         """
         if request.method == 'POST':
-            return self.add_to_list(ShoppingCartSerializer, request.user, pk)
+            return self.add_to_list(ShoppingCart, request.user, pk)
         return self.remove_from_list(ShoppingCart, request.user, pk)
 
-    def add_to_list(self, serializer, user, pk):
+    @decorators.action(
+        detail=False,
+        methods=('post', 'delete'),
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='favorite/bulk'
+    )
+    def bulk_favorite(self, request):
         """
-        Add recipe to the specified list.
+        Add or remove several recipes from favorites.
         """
-        try:
-            recipe = Recipe.objects.get(pk=pk)
-        except ObjectDoesNotExist:
-            raise exceptions.ValidationError(
-                constants.RECIPE_DOES_NOT_EXIST.format(pk))
-        serializer = serializer(data={'user': user.id, 'recipe': recipe.id})
+        serializer = RecipeIdsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.bulk_change_list(
+            Favorite, request, serializer.validated_data['recipes'])
+
+    @decorators.action(
+        detail=False,
+        methods=('post', 'delete'),
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='shopping_cart/bulk'
+    )
+    def bulk_shopping_cart(self, request):
+        """
+        Add or remove several recipes from shopping cart.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.bulk_change_list(
+            ShoppingCart, request, serializer.validated_data['recipes'])
+
+    @decorators.action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='shopping_cart/from_favorites'
+    )
+    def copy_favorites_to_cart(self, request):
+        """
+        Add all favorite recipes to shopping cart.
+        """
+        return self.bulk_change_list(
+            ShoppingCart, request,
+            list(Favorite.objects.filter(
+                user_id=request.user.id).values_list('recipe_id', flat=True))
+        )
+
+    @decorators.action(
+        detail=False,
+        methods=('delete',),
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='shopping_cart/clear'
+    )
+    def clear_shopping_cart(self, request):
+        """
+        Remove all recipes from shopping cart.
+        """
+        user = request.user
+        remove_recipes(ShoppingCart, user.id, list(
+            ShoppingCart.objects.filter(
+                user_id=user.id).values_list('recipe_id', flat=True)))
+        invalidate_membership(SHOPPING_CART, user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def bulk_change_list(self, model_class, request, recipe_ids):
+        """
+        Add (POST) or remove the recipes from the specified list with
+        one write, reporting the outcome for every recipe ID from the
+        rows the write actually changed.
+        """
+        user = request.user
+        if request.method == 'POST':
+            found, changed = add_recipes(model_class, user.id, recipe_ids)
+            outcomes = (constants.BULK_ADDED, constants.BULK_ALREADY_ADDED)
+        else:
+            found, changed = remove_recipes(model_class, user.id, recipe_ids)
+            outcomes = (constants.BULK_REMOVED, constants.BULK_NOT_IN_LIST)
+        if changed:
+            invalidate_membership(
+                FAVORITES if model_class is Favorite else SHOPPING_CART,
+                user.id)
+        return Response({'recipes': [
+            {'id': recipe_id,
+             'status': (outcomes[0] if recipe_id in changed
+                        else outcomes[1] if recipe_id in found
+                        else constants.BULK_NOT_FOUND)}
+            for recipe_id in recipe_ids
+        ]}, status=status.HTTP_200_OK)
+
+    def add_to_list(self, model_class, user, pk):
+        """
+        Add recipe to the specified list with a single statement,
+        which also settles concurrent requests adding the same recipe.
+        """
+        if not toggle(link, model_class, user.id, 'recipe', pk):
+            if not Recipe.objects.filter(pk=pk).exists():
+                raise exceptions.ValidationError(
+                    constants.RECIPE_DOES_NOT_EXIST.format(pk))
+            raise exceptions.ValidationError(
+                constants.RECIPE_ALREADY_IN_LIST.format(
+                    model_class._meta.verbose_name))
+        return Response(
+            SimpleRecipeSerializer(get_object_or_404(Recipe, pk=pk)).data,
+            status=status.HTTP_201_CREATED
+        )
 
     def remove_from_list(self, model_class, user, pk):
         """
-        Remove recipe from the specified list.
+        Remove recipe from the specified list with a single statement.
         """
-        try:
-            model_class.objects.get(
-                user=user, recipe=get_object_or_404(Recipe, pk=pk)
-            ).delete()
-        except ObjectDoesNotExist:
+        if not toggle(unlink, model_class, user.id, 'recipe', pk):
+            get_object_or_404(Recipe, pk=pk)
             raise exceptions.ValidationError(
                 constants.RECIPE_NOT_IN_LIST.format(
-                    model_class.__class__.__name__))
+                    model_class._meta.verbose_name))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def download_file_response(self, shopping_cart):
         """
-        Generate HTTP response for downloading a text file.
+        Generate a streaming HTTP response for downloading the shopping
+        cart in the negotiated format.
         """
-        content = '\n'.join(((f'- {item.get("ingredient__name")} '
-                              f'({item.get("ingredient__measurement_unit")}) '
-                              f'— {item.get("ingredient_total")}')
-                            for item in shopping_cart))
-        response = HttpResponse(
-            content, content_type='text/plain,charset=utf8'
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(shopping_cart.iterator()),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
         )
-        response['Content-Disposition'] = ('attachment; '
-                                           'filename="shopping_cart.txt"')
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_cart.{renderer.format}"')
         return response
 
+    @decorators.action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(permissions.IsAuthenticated,),
+        pagination_class=LimitCursorPagination,
+        cursor_ordering=('-feed_date', '-id')
+    )
+    def feed(self, request):
+        """
+        List recipes of the followed authors, newest first, from
+        the user's precomputed feed.
+        """
+        recipes = self.get_queryset().filter(
+            feed_entries__user_id=request.user.id
+        ).annotate(feed_date=F('feed_entries__pub_date'))
+        return self.get_paginated_response(self.get_serializer(
+            self.paginate_queryset(recipes), many=True).data)
+
+    @decorators.action(detail=True, methods=('get',))
+    def similar(self, request, pk):
+        """
+        List recipes most often favorited together with the recipe,
+        as precomputed by the update_similarities command.
+        """
+        get_object_or_404(Recipe, pk=pk)
+        recipes = self.get_queryset().filter(
+            similar_to__recipe_id=pk).order_by('-similar_to__score')
+        return Response(self.get_serializer(recipes, many=True).data)
+
     @decorators.action(
         detail=False,
         methods=('get',),
         permission_classes=(permissions.IsAuthenticated,)
     )
+    def recommended(self, request):
+        """
+        List recipes similar to the user's favorites that the user
+        has not favorited yet, best matches first.
+        """
+        recipes = self.get_queryset().filter(
+            similar_to__recipe__favorites__user_id=request.user.id
+        ).exclude(
+            favorites__user_id=request.user.id
+        ).annotate(
+            recommendation=Sum('similar_to__score')
+        ).order_by('-recommendation', '-pub_date')
+        return self.get_paginated_response(self.get_serializer(
+            self.paginate_queryset(recipes), many=True).data)
+
+    @decorators.action(detail=False, methods=('get',))
+    def cookable(self, request):
+        """
+        List recipes containing the given ingredients, the ones
+        missing the fewest others first.
+
+        Candidates are found through the (ingredient, recipe) index
+        of ingredient amounts and compared with the recipe's stored
+        ingredient count, so no recipe is scanned in Python.
+        """
+        ids = [int(id) for id in request.query_params.getlist('ingredients')
+               if id.isdigit()]
+        if not ids:
+            raise exceptions.ValidationError(
+                {'ingredients': constants.ERROR_NO_INGREDIENT})
+        recipes = self.filter_queryset(self.get_queryset()).filter(
+            ingredient_amounts__ingredient_id__in=ids
+        ).annotate(
+            matched=Count('ingredient_amounts'),
+            total=Greatest('ingredients_count', 'matched'),
+            missing=F('total') - F('matched'),
+            coverage=Cast('matched', FloatField()) / F('total'),
+        )
+        max_missing = request.query_params.get('max_missing')
+        if max_missing and max_missing.isdigit():
+            recipes = recipes.filter(missing__lte=int(max_missing))
+        page = self.paginate_queryset(
+            recipes.order_by('-coverage', 'missing', '-pub_date'))
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data)
+
+    @decorators.action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(renderers.TextShoppingCartRenderer,
+                          renderers.CSVShoppingCartRenderer,
+                          renderers.JSONShoppingCartRenderer)
+    )
     def download_shopping_cart(self, request):
         """
         Generate shopping cart.
         """
-        return self.download_file_response(IngredientAmount.objects.filter(
-            recipe__cart_items__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(ingredient_total=Sum('amount')))
+        return self.download_file_response(
+            ShoppingCartIngredient.objects.filter(
+                user_id=request.user.id
+            ).values(
+                'ingredient__name', 'ingredient__measurement_unit'
+            ).annotate(
+                ingredient_total=F('amount')
+            ).order_by('ingredient__name', 'ingredient__measurement_unit'))
@@ -4,6 +4,16 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from . import constants
 from .models import (Favorite, Follow, Ingredient, IngredientAmount, Recipe,
                      ShoppingCart, Tag, User)
+from .shopping_cart import rebuild_cart_summaries
+
+
+def rebuild_recipe_carts(recipe):
+    """
+    Rebuild shopping cart summaries of users who have the recipe
+    in the cart after its ingredients were edited.
+    """
+    rebuild_cart_summaries(list(recipe.cart_items.values_list(
+        'user_id', flat=True)))
 
 
 class TagInline(admin.TabularInline):
@@ -21,18 +31,10 @@ class IngredientAmountInline(admin.TabularInline):
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'username', 'first_name',
-                    'last_name', 'recipe_count', 'follower_count')
+                    'last_name', 'recipes_count', 'followers_count')
     list_filter = ('email', 'username')
     search_fields = ('email', 'username')
 
-    @admin.display(description='Recipes')
-    def recipe_count(self, obj):
-        return obj.recipes.count()
-
-    @admin.display(description='Followers')
-    def follower_count(self, obj):
-        return obj.following.count()
-
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -51,13 +53,13 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientAmountInline, TagInline)
-    list_display = ('name', 'author', 'favorite_count')
+    list_display = ('name', 'author', 'favorites_count')
     list_filter = ('author', 'name', 'tags__name')
     search_fields = ('name', 'author__username')
 
-    @admin.display(description='Favorites')
-    def favorite_count(self, obj):
-        return obj.favorites.count()
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        rebuild_recipe_carts(form.instance)
 
 
 @admin.register(IngredientAmount)
@@ -66,6 +68,14 @@ class IngredientAmountAdmin(admin.ModelAdmin):
     list_filter = ('ingredient', 'recipe')
     search_fields = ('ingredient__name', 'recipe__name')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        rebuild_recipe_carts(obj.recipe)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        rebuild_recipe_carts(obj.recipe)
+
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
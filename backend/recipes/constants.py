@@ -59,3 +59,23 @@ RECIPE_IN_FAVORITE = '{} in {}\'s favorites'
 ALREADY_FOLLOW = 'you already follow this author'
 FOLLOWS = '{} follows {}'
 PUB_DATE = 'publication date'
+RECIPES_COUNT = 'recipes count'
+FOLLOWERS_COUNT = 'followers count'
+FAVORITES_COUNT = 'favorites count'
+INGREDIENTS_COUNT = 'ingredients count'
+SIMILARITIES_OUTDATED = 'similar recipes need recomputing'
+SEARCH_VECTOR = 'search vector'
+SHOPPING_CART_INGREDIENT = 'shopping cart ingredient'
+SHOPPING_CART_INGREDIENTS = 'shopping cart ingredients'
+SHOPPING_CART_TOTAL = 'total amount'
+INGREDIENT_IN_SHOPPING_CART = 'ingredient already in shopping cart summary'
+FEED_ENTRY = 'feed entry'
+FEED_ENTRIES = 'feed entries'
+RECIPE_IN_FEED = 'recipe already in feed'
+RECIPE_IN_USER_FEED = '{} in {}\'s feed'
+SIMILAR_RECIPE = 'similar recipe'
+SIMILARITY_SCORE = 'similarity score'
+RECIPE_SIMILARITY = 'recipe similarity'
+RECIPE_SIMILARITIES = 'recipe similarities'
+SIMILARITY_EXISTS = 'similarity already computed'
+SIMILAR_TO = '{} is similar to {}'
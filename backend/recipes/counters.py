@@ -0,0 +1,45 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Follow, IngredientAmount, Recipe, User
+
+# Counter field, the model holding it, and the model and foreign key
+# whose rows it counts.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'ingredients_count', IngredientAmount, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def update_counter(model, pks, field, delta, **values):
+    """
+    Atomically add delta to the counter field of the given rows,
+    setting other field values in the same statement.
+    """
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, Value(0))}, **values)
+
+
+def reconcile_counters():
+    """
+    Recompute every counter from the rows it counts and fix the
+    ones that drifted.
+
+    Returns:
+        dict: Number of fixed rows per counter field.
+    """
+    fixed = {}
+    for model, field, counted_model, foreign_key in COUNTERS:
+        actual = Coalesce(Subquery(
+            counted_model.objects.filter(
+                **{foreign_key: OuterRef('pk')}
+            ).order_by().values(foreign_key).annotate(
+                count=Count('pk')
+            ).values('count')
+        ), Value(0))
+        fixed[f'{model._meta.model_name}.{field}'] = model.objects.annotate(
+            actual=actual
+        ).exclude(**{field: F('actual')}).update(**{field: actual})
+    return fixed
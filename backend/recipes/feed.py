@@ -0,0 +1,71 @@
+import itertools
+
+from django.db import transaction
+
+from .models import FeedEntry, Follow, Recipe
+
+FEED_BATCH_SIZE = 5000
+
+
+def add_to_feeds(entries):
+    """
+    Insert (user ID, recipe ID, publication date) feed entries in
+    batches, skipping the ones that already exist.
+    """
+    entries = iter(entries)
+    while batch := list(itertools.islice(entries, FEED_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(
+            (FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                       pub_date=pub_date)
+             for user_id, recipe_id, pub_date in batch),
+            ignore_conflicts=True
+        )
+
+
+def fan_out_recipe(recipe):
+    """
+    Add a new recipe to the feeds of its author's followers.
+    """
+    add_to_feeds(
+        (user_id, recipe.pk, recipe.pub_date)
+        for user_id in Follow.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def follow_author(user_id, author_id):
+    """
+    Add the author's recipes to the feed of a new follower.
+    """
+    add_to_feeds(
+        (user_id, recipe_id, pub_date)
+        for recipe_id, pub_date in Recipe.objects.filter(
+            author_id=author_id
+        ).values_list('pk', 'pub_date').iterator()
+    )
+
+
+def unfollow_author(user_id, author_id):
+    """
+    Remove the author's recipes from the feed of a former follower.
+    """
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id).delete()
+
+
+def rebuild_feeds(user_ids=None):
+    """
+    Recompute feeds from the subscriptions, for the given users
+    or for everyone.
+    """
+    entries = FeedEntry.objects.all()
+    follows = Follow.objects.filter(author__recipes__isnull=False)
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        entries.delete()
+        add_to_feeds(follows.values_list(
+            'user_id', 'author__recipes', 'author__recipes__pub_date'
+        ).order_by().iterator())
@@ -0,0 +1,216 @@
+import json
+import math
+import random
+import re
+import statistics
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, User
+
+DEFAULT_REQUESTS = 50
+DEFAULT_WARMUP = 5
+DEFAULT_TOLERANCE = 0.2
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries')
+SAMPLE_SIZE = 1000
+LIST_PAGE_SIZE = 6
+LIST_PAGES = 20
+SCENARIOS = {
+    'recipe_list': lambda data: (
+        f'/api/recipes/?page={random.randint(1, data["pages"])}'
+        f'&limit={LIST_PAGE_SIZE}'),
+    'recipe_detail': lambda data: (
+        f'/api/recipes/{random.choice(data["recipe_ids"])}/'),
+    'ingredient_search': lambda data: (
+        f'/api/ingredients/?name={random.choice(data["prefixes"])}'),
+    'subscriptions': lambda data: (
+        '/api/users/subscriptions/?recipes_limit=3'),
+    'download_cart': lambda data: (
+        '/api/recipes/download_shopping_cart/'),
+}
+
+
+class TestClientRunner:
+    """
+    Send requests through the Django test client, counting queries
+    with the test utilities.
+    """
+
+    def __init__(self, token):
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            duration = time.perf_counter() - started
+        return duration, len(queries), response.status_code
+
+
+class LiveServerRunner:
+    """
+    Send requests to a running server, reading query counts from
+    Server-Timing headers when METRICS_ENABLED is set there.
+    """
+
+    def __init__(self, url, token):
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+
+    def get(self, path):
+        started = time.perf_counter()
+        response = self.session.get(self.url + path)
+        duration = time.perf_counter() - started
+        match = SERVER_TIMING_QUERIES.search(
+            response.headers.get('Server-Timing', ''))
+        return (duration, int(match[1]) if match else None,
+                response.status_code)
+
+
+def summarize(durations, queries, errors):
+    """
+    Return latency percentiles in milliseconds, the median number
+    of queries per request and the number of failed requests.
+    """
+    percentiles = statistics.quantiles(
+        [duration * 1000 for duration in durations], n=100,
+        method='inclusive')
+    queries = [count for count in queries if count is not None]
+    return {
+        'p50': percentiles[49],
+        'p95': percentiles[94],
+        'p99': percentiles[98],
+        'queries': statistics.median(queries) if queries else None,
+        'errors': errors,
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Yield descriptions of scenarios slower or running more queries
+    than in the baseline.
+    """
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p95'] > base['p95'] * (1 + tolerance):
+            yield (f'{name}: p95 {result["p95"]:.1f} ms, baseline '
+                   f'{base["p95"]:.1f} ms')
+        if (result['queries'] is not None and base['queries'] is not None
+                and result['queries'] > base['queries']):
+            yield (f'{name}: {result["queries"]} queries, baseline '
+                   f'{base["queries"]}')
+
+
+class Command(BaseCommand):
+    help = ('Replay API requests against seeded data and report latency '
+            'percentiles and queries per request')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario',
+                            action='append',
+                            choices=SCENARIOS,
+                            help='Scenario to run, all by default')
+        parser.add_argument('--requests',
+                            type=int,
+                            default=DEFAULT_REQUESTS,
+                            help=(f'Measured requests per scenario '
+                                  f'(default: {DEFAULT_REQUESTS})'))
+        parser.add_argument('--warmup',
+                            type=int,
+                            default=DEFAULT_WARMUP,
+                            help=(f'Unmeasured requests per scenario '
+                                  f'(default: {DEFAULT_WARMUP})'))
+        parser.add_argument('--url',
+                            help=('Base URL of a running server, e.g. '
+                                  'http://127.0.0.1:8000, instead of '
+                                  'the test client'))
+        parser.add_argument('--baseline',
+                            help='JSON file with results to compare with')
+        parser.add_argument('--save-baseline',
+                            help='JSON file to store the results in')
+        parser.add_argument('--tolerance',
+                            type=float,
+                            default=DEFAULT_TOLERANCE,
+                            help=(f'Allowed p95 slowdown against the '
+                                  f'baseline (default: {DEFAULT_TOLERANCE})'))
+        parser.add_argument('--seed',
+                            type=int,
+                            default=0,
+                            help='Random seed (default: 0)')
+
+    def get_data(self):
+        user = User.objects.filter(
+            username__startswith='benchmark-',
+            cart_items__isnull=False,
+            follower__isnull=False,
+        ).first()
+        if user is None:
+            raise CommandError('Seed data first with seed_benchmark.')
+        return {
+            'token': Token.objects.get_or_create(user=user)[0].key,
+            'pages': max(1, min(LIST_PAGES, math.ceil(
+                Recipe.objects.count() / LIST_PAGE_SIZE))),
+            'recipe_ids': list(Recipe.objects.values_list(
+                'pk', flat=True)[:SAMPLE_SIZE]),
+            'prefixes': sorted({name[:2] for name in Ingredient.objects.
+                                values_list('name', flat=True)[:SAMPLE_SIZE]}),
+        }
+
+    def run_scenario(self, runner, make_path, data, count, warmup):
+        durations, queries, errors = [], [], 0
+        for number in range(warmup + count):
+            duration, query_count, status = runner.get(make_path(data))
+            if number < warmup:
+                continue
+            durations.append(duration)
+            queries.append(query_count)
+            errors += status >= 400
+        return summarize(durations, queries, errors)
+
+    def handle(self, *args, **kwargs):
+        if kwargs['requests'] < 2:
+            raise CommandError('At least 2 requests per scenario are needed.')
+        random.seed(kwargs['seed'])
+        data = self.get_data()
+        if kwargs['url']:
+            runner = LiveServerRunner(kwargs['url'], data['token'])
+        else:
+            runner = TestClientRunner(data['token'])
+        results = {}
+        self.stdout.write(f'{"scenario":<20}{"p50 ms":>10}{"p95 ms":>10}'
+                          f'{"p99 ms":>10}{"queries":>10}{"errors":>8}')
+        with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in kwargs['scenario'] or SCENARIOS:
+                result = results[name] = self.run_scenario(
+                    runner, SCENARIOS[name], data, kwargs['requests'],
+                    kwargs['warmup'])
+                queries = ('-' if result['queries'] is None
+                           else f'{result["queries"]:g}')
+                self.stdout.write(
+                    f'{name:<20}{result["p50"]:>10.1f}{result["p95"]:>10.1f}'
+                    f'{result["p99"]:>10.1f}{queries:>10}'
+                    f'{result["errors"]:>8}')
+        if kwargs['save_baseline']:
+            with open(kwargs['save_baseline'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+        if kwargs['baseline']:
+            with open(kwargs['baseline'], encoding='utf-8') as file:
+                regressions = list(find_regressions(
+                    results, json.load(file), kwargs['tolerance']))
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n'
+                                   + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Benchmark completed.'))
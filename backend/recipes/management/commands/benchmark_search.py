@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.search import search_recipes
+from recipes.counters import update_counter
+from recipes.models import Recipe, User
+from recipes.seeding import bulk_insert, generate_recipes
+
+BENCHMARK_USERNAME = 'search-benchmark'
+DEFAULT_QUERIES = ('курица', 'суп', 'шоколадный торт', 'рис овощи')
+DEFAULT_REPEAT = 5
+
+
+def seed_recipes(count):
+    """
+    Create synthetic recipes until the database holds at least
+    count recipes.
+
+    Returns:
+        int: Number of recipes created.
+    """
+    missing = count - Recipe.objects.count()
+    if missing <= 0:
+        return 0
+    author, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={'email': f'{BENCHMARK_USERNAME}@example.com',
+                  'first_name': 'Search', 'last_name': 'Benchmark'}
+    )
+    bulk_insert(Recipe, generate_recipes((author.pk,), missing),
+                'Seeding recipes')
+    update_counter(User, (author.pk,), 'recipes_count', missing)
+    return missing
+
+
+def time_query(get_queryset, repeat):
+    """
+    Time loading the first page and the count of a queryset, the
+    work of one recipe list request.
+
+    Returns:
+        tuple: Median milliseconds and the number of matches.
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        queryset = get_queryset()
+        list(queryset.values_list('pk', flat=True)[:page_size])
+        count = queryset.count()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), count
+
+
+class Command(BaseCommand):
+    help = 'Compare full-text recipe search with icontains filtering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries',
+                            nargs='*',
+                            default=DEFAULT_QUERIES,
+                            help='Search queries to benchmark')
+        parser.add_argument('--recipes',
+                            type=int,
+                            metavar='COUNT',
+                            help=('Seed synthetic recipes until there are '
+                                  'COUNT of them, e.g. 1000000'))
+        parser.add_argument('--repeat',
+                            type=int,
+                            default=DEFAULT_REPEAT,
+                            help=(f'Runs per query, the median is reported '
+                                  f'(default: {DEFAULT_REPEAT})'))
+
+    def handle(self, *args, **kwargs):
+        if kwargs['recipes']:
+            created = seed_recipes(kwargs['recipes'])
+            self.stdout.write(f'{created} synthetic recipes created.')
+        self.stdout.write(
+            f'{Recipe.objects.count()} recipes, median of '
+            f'{kwargs["repeat"]} runs per query:')
+        for query in kwargs['queries']:
+            search_ms, search_count = time_query(
+                lambda: search_recipes(Recipe.objects.all(), query),
+                kwargs['repeat'])
+            icontains_ms, icontains_count = time_query(
+                lambda: Recipe.objects.filter(
+                    Q(name__icontains=query) | Q(text__icontains=query)),
+                kwargs['repeat'])
+            self.stdout.write(
+                f'{query!r}: search {search_ms:.1f} ms '
+                f'({search_count} matches), icontains {icontains_ms:.1f} ms '
+                f'({icontains_count} matches)')
+        self.stdout.write(self.style.SUCCESS('Benchmark completed.'))
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastRecipeSerializer, values
+from api.serializers import RecipeSerializer
+from recipes.models import IngredientAmount, Recipe
+
+DEFAULT_RECIPES = 100
+DEFAULT_REPEAT = 20
+
+
+def drf_recipes(request, count):
+    recipes = Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch('ingredient_amounts',
+                 queryset=IngredientAmount.objects.select_related(
+                     'ingredient').order_by('pk')),
+    )[:count]
+    return RecipeSerializer(
+        recipes, many=True, context={'request': request}).data
+
+
+def fast_recipes(request, count):
+    serializer = FastRecipeSerializer(request)
+    return serializer.to_representation(
+        values(Recipe.objects.all(), serializer.get_columns())[:count])
+
+
+class Command(BaseCommand):
+    help = ('Compare the output and time of RecipeSerializer and its '
+            'fast-path counterpart')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes',
+                            type=int,
+                            default=DEFAULT_RECIPES,
+                            help=(f'Recipes serialized per run '
+                                  f'(default: {DEFAULT_RECIPES})'))
+        parser.add_argument('--repeat',
+                            type=int,
+                            default=DEFAULT_REPEAT,
+                            help=(f'Runs per serializer, the median is '
+                                  f'reported (default: {DEFAULT_REPEAT})'))
+
+    def time_serializer(self, serialize, count, repeat):
+        """
+        Return the rendered output and the median milliseconds of
+        loading, serializing and rendering the recipes.
+        """
+        renderer = JSONRenderer()
+        timings = []
+        for _ in range(repeat):
+            request = Request(APIRequestFactory().get('/api/recipes/'))
+            request.user = AnonymousUser()
+            started = time.perf_counter()
+            content = renderer.render(serialize(request, count))
+            timings.append((time.perf_counter() - started) * 1000)
+        return content, statistics.median(timings)
+
+    def handle(self, *args, **kwargs):
+        count, repeat = kwargs['recipes'], kwargs['repeat']
+        with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            drf_content, drf_ms = self.time_serializer(
+                drf_recipes, count, repeat)
+            fast_content, fast_ms = self.time_serializer(
+                fast_recipes, count, repeat)
+        if drf_content != fast_content:
+            raise CommandError('The fast-path output differs from '
+                               'RecipeSerializer output.')
+        self.stdout.write(
+            f'{min(count, Recipe.objects.count())} recipes, median of '
+            f'{repeat} runs: RecipeSerializer {drf_ms:.1f} ms, fast path '
+            f'{fast_ms:.1f} ms ({drf_ms / fast_ms:.1f}x).')
+        self.stdout.write(self.style.SUCCESS('Benchmark completed.'))
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import reconcile_counters
+from recipes.models import Favorite, Recipe
+from recipes.seeding import create_users, link_recipes
+from recipes.similarity import update_similarities
+
+BENCHMARK_USERNAME = 'similarity-benchmark'
+DEFAULT_FAVORITES_PER_USER = 20
+DEFAULT_CHANGED_SHARE = 0.01
+
+
+def seed_favorites(count, favorites_per_user):
+    """
+    Create synthetic users favoriting about count recipes, with
+    a long-tailed recipe popularity.
+
+    Returns:
+        int: Number of favorites created.
+    """
+    recipe_ids = list(Recipe.objects.values_list('pk', flat=True))
+    if not recipe_ids:
+        raise CommandError('Seed recipes first, e.g. with '
+                           'seed_benchmark or benchmark_search --recipes.')
+    user_ids = create_users(count // favorites_per_user, BENCHMARK_USERNAME)
+    created = link_recipes(Favorite, user_ids, recipe_ids,
+                           favorites_per_user, 'Seeding favorites')
+    reconcile_counters()
+    return created
+
+
+class Command(BaseCommand):
+    help = 'Time full and incremental recomputation of similar recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--favorites',
+                            type=int,
+                            metavar='COUNT',
+                            help=('Seed about COUNT synthetic favorites '
+                                  'first, e.g. 1000000'))
+        parser.add_argument('--favorites-per-user',
+                            type=int,
+                            default=DEFAULT_FAVORITES_PER_USER,
+                            help=(f'Favorites per synthetic user '
+                                  f'(default: {DEFAULT_FAVORITES_PER_USER})'))
+        parser.add_argument('--changed',
+                            type=float,
+                            default=DEFAULT_CHANGED_SHARE,
+                            help=(f'Share of recipes marked changed for '
+                                  f'the incremental run '
+                                  f'(default: {DEFAULT_CHANGED_SHARE})'))
+
+    def handle(self, *args, **kwargs):
+        if kwargs['favorites']:
+            created = seed_favorites(kwargs['favorites'],
+                                     kwargs['favorites_per_user'])
+            self.stdout.write(f'{created} synthetic favorites created.')
+        self.stdout.write(f'{Favorite.objects.count()} favorites, '
+                          f'{Recipe.objects.count()} recipes.')
+        started = time.perf_counter()
+        processed = update_similarities(full=True)
+        self.stdout.write(f'Full run: {processed} recipes in '
+                          f'{time.perf_counter() - started:.2f}s.')
+        favorited = Recipe.objects.filter(favorites_count__gt=0)
+        changed = list(favorited.order_by('?').values_list(
+            'pk', flat=True)[:max(1, int(
+                favorited.count() * kwargs['changed']))])
+        Recipe.objects.filter(pk__in=changed).update(
+            similarities_outdated=True)
+        started = time.perf_counter()
+        processed = update_similarities()
+        self.stdout.write(f'Incremental run: {processed} recipes in '
+                          f'{time.perf_counter() - started:.2f}s.')
+        self.stdout.write(self.style.SUCCESS('Benchmark completed.'))
@@ -1,60 +1,148 @@
 import csv
+import io
+import json
+import time
 
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from tqdm import tqdm
 
+from api.cache import bump_generation
 from recipes.models import Ingredient
 
+DEFAULT_BATCH_SIZE = 5000
 
-def import_ingredients_from_csv(csv_file):
+
+def read_ingredients(file_path):
+    """
+    Yield (name, measurement_unit) pairs from a CSV or JSON file.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        if file_path.endswith('.json'):
+            for item in json.load(file):
+                yield item['name'], item['measurement_unit']
+        else:
+            for row in csv.reader(file):
+                yield row[0], row[1]
+
+
+def generate_ingredients(count):
+    """
+    Yield synthetic (name, measurement_unit) pairs for benchmarking.
+    """
+    for number in range(count):
+        yield f'synthetic ingredient {number}', 'г'
+
+
+def copy_ingredients(batch):
+    """
+    Insert a batch through PostgreSQL COPY into a temporary table,
+    skipping rows that already exist.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    table = Ingredient._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE IF NOT EXISTS ingredient_import '
+            '(name varchar, measurement_unit varchar) ON COMMIT DROP'
+        )
+        cursor.execute('TRUNCATE ingredient_import')
+        cursor.cursor.copy_expert(
+            'COPY ingredient_import FROM STDIN WITH '
+            '(FORMAT csv, FORCE_NOT_NULL (name, measurement_unit))', buffer)
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            'SELECT name, measurement_unit FROM ingredient_import '
+            'ON CONFLICT DO NOTHING'
+        )
+        return cursor.rowcount
+
+
+def insert_ingredients(batch):
+    """
+    Insert a batch of (name, measurement_unit) pairs.
+    """
+    if connection.vendor == 'postgresql':
+        return copy_ingredients(batch)
+    Ingredient.objects.bulk_create(
+        (Ingredient(name=name, measurement_unit=measurement_unit)
+         for name, measurement_unit in batch),
+        batch_size=len(batch),
+        ignore_conflicts=True
+    )
+    return len(batch)
+
+
+def import_ingredients(rows, batch_size=DEFAULT_BATCH_SIZE):
     """
-    Import data from a CSV file into the database for the Ingredient model.
+    Import ingredients into the database in batches.
 
     Args:
-        csv_file (str): Path to the CSV file containing ingredient data.
+        rows (iterable): (name, measurement_unit) pairs to import.
+        batch_size (int): Number of rows inserted per statement.
 
-    Raises:
-        FileNotFoundError: If the specified CSV file does not exist.
-        PermissionError: If the specified CSV file cannot be read due
-        to lack of permissions.
-        ValueError: If the CSV file is empty or has invalid format.
+    Returns:
+        tuple: Number of rows read and number of ingredients created.
 
     Usage:
         This function can be called from the command line using:
         python manage.py import_ingredients data/ingredients.csv
     """
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        total_rows = sum(1 for row in reader)
-        file.seek(0)
-        with tqdm(total=total_rows,
-                  desc='Importing ingredients',
-                  unit=' row') as pbar:
-            for row in reader:
-                name, measurement_unit = row[0], row[1]
-                ingredient, created = Ingredient.objects.get_or_create(
-                    name=name, measurement_unit=measurement_unit
-                )
-                if created:
-                    pbar.set_postfix({'New ingredient': name})
-                else:
-                    pbar.set_postfix({'Existing ingredient': name})
-                pbar.update(1)
+    existing = set(Ingredient.objects.values_list(
+        'name', 'measurement_unit').iterator())
+    total = created = 0
+    batch = []
+    with transaction.atomic():
+        for row in tqdm(rows, desc='Importing ingredients', unit=' row'):
+            total += 1
+            if row in existing:
+                continue
+            existing.add(row)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                created += insert_ingredients(batch)
+                batch = []
+        if batch:
+            created += insert_ingredients(batch)
+    if created:
+        bump_generation(Ingredient)
+    return total, created
 
 
 class Command(BaseCommand):
-    help = 'Import ingredients from a CSV file'
+    help = 'Import ingredients from a CSV or JSON file'
     default_filename = 'data/ingredients.csv'
 
     def add_arguments(self, parser):
-        parser.add_argument('csv_file_path',
+        parser.add_argument('file_path',
                             nargs='?',
                             type=str,
                             default=self.default_filename,
-                            help=(f'Path to the CSV file '
+                            help=(f'Path to the CSV or JSON file '
                                   f'(default: {self.default_filename})'))
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help=(f'Rows inserted per statement '
+                                  f'(default: {DEFAULT_BATCH_SIZE})'))
+        parser.add_argument('--synthetic',
+                            type=int,
+                            metavar='COUNT',
+                            help=('Import COUNT generated ingredients '
+                                  'instead of a file, e.g. 1000000 to '
+                                  'benchmark the importer'))
 
     def handle(self, *args, **kwargs):
-        import_ingredients_from_csv(kwargs['csv_file_path'])
+        if kwargs['synthetic']:
+            rows = generate_ingredients(kwargs['synthetic'])
+        else:
+            rows = read_ingredients(kwargs['file_path'])
+        started = time.perf_counter()
+        total, created = import_ingredients(rows, kwargs['batch_size'])
+        elapsed = time.perf_counter() - started
         self.stdout.write(self.style.SUCCESS(
-            'Ingredients import completed successfully.'))
+            f'Ingredients import completed successfully: {total} rows read, '
+            f'{created} created in {elapsed:.2f}s '
+            f'({total / elapsed if elapsed else total:.0f} rows/s).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = 'Recompute the recipe feeds of all users from their subscriptions'
+
+    def handle(self, *args, **kwargs):
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS('Feeds rebuilt successfully.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_cart import rebuild_cart_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute shopping cart ingredient totals of all users'
+
+    def handle(self, *args, **kwargs):
+        rebuild_cart_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            'Shopping carts rebuilt successfully.'))
@@ -0,0 +1,104 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.management.commands.import_ingredients import (import_ingredients,
+                                                            read_ingredients)
+from recipes.models import Favorite, Ingredient, ShoppingCart
+from recipes.seeding import (create_follows, create_recipes, create_tags,
+                             create_users, fill_recipes, link_recipes,
+                             refresh_denormalized_data)
+
+BENCHMARK_USERNAME = 'benchmark'
+SCALES = {
+    'small': {'users': 100, 'recipes': 1000},
+    'medium': {'users': 10000, 'recipes': 100000},
+    'large': {'users': 100000, 'recipes': 1000000},
+}
+DEFAULT_SCALE = 'small'
+DEFAULT_AUTHOR_SHARE = 0.1
+DEFAULT_INGREDIENTS_PER_RECIPE = 7
+DEFAULT_FAVORITES_PER_USER = 20
+DEFAULT_CART_PER_USER = 5
+DEFAULT_FOLLOWS_PER_USER = 10
+
+
+class Command(BaseCommand):
+    help = ('Generate synthetic users, recipes, favorites, shopping carts '
+            'and subscriptions for benchmarking')
+    default_filename = 'data/ingredients.csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale',
+                            choices=SCALES,
+                            default=DEFAULT_SCALE,
+                            help=(f'Preset numbers of users and recipes '
+                                  f'(default: {DEFAULT_SCALE})'))
+        parser.add_argument('--users',
+                            type=int,
+                            help='Number of users, overriding the scale')
+        parser.add_argument('--recipes',
+                            type=int,
+                            help='Number of recipes, overriding the scale')
+        parser.add_argument('--author-share',
+                            type=float,
+                            default=DEFAULT_AUTHOR_SHARE,
+                            help=(f'Share of users who publish recipes '
+                                  f'(default: {DEFAULT_AUTHOR_SHARE})'))
+        parser.add_argument('--ingredients-per-recipe',
+                            type=int,
+                            default=DEFAULT_INGREDIENTS_PER_RECIPE,
+                            help=(f'Average ingredients per recipe '
+                                  f'(default: '
+                                  f'{DEFAULT_INGREDIENTS_PER_RECIPE})'))
+        parser.add_argument('--favorites-per-user',
+                            type=int,
+                            default=DEFAULT_FAVORITES_PER_USER,
+                            help=(f'Favorites per user '
+                                  f'(default: {DEFAULT_FAVORITES_PER_USER})'))
+        parser.add_argument('--cart-per-user',
+                            type=int,
+                            default=DEFAULT_CART_PER_USER,
+                            help=(f'Shopping cart recipes per user '
+                                  f'(default: {DEFAULT_CART_PER_USER})'))
+        parser.add_argument('--follows-per-user',
+                            type=int,
+                            default=DEFAULT_FOLLOWS_PER_USER,
+                            help=(f'Followed authors per user '
+                                  f'(default: {DEFAULT_FOLLOWS_PER_USER})'))
+        parser.add_argument('--ingredients-file',
+                            default=self.default_filename,
+                            help=(f'Ingredients imported if there are none '
+                                  f'(default: {self.default_filename})'))
+        parser.add_argument('--seed',
+                            type=int,
+                            default=0,
+                            help='Random seed, for reproducible data '
+                                 '(default: 0)')
+
+    def handle(self, *args, **kwargs):
+        random.seed(kwargs['seed'])
+        scale = SCALES[kwargs['scale']]
+        users = kwargs['users'] or scale['users']
+        recipes = kwargs['recipes'] or scale['recipes']
+        started = time.perf_counter()
+        if not Ingredient.objects.exists():
+            import_ingredients(read_ingredients(kwargs['ingredients_file']))
+        ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+        tag_ids = create_tags()
+        user_ids = create_users(users, BENCHMARK_USERNAME)
+        author_ids = user_ids[:max(1, int(users * kwargs['author_share']))]
+        recipe_ids = create_recipes(author_ids, recipes)
+        fill_recipes(recipe_ids, ingredient_ids, tag_ids,
+                     kwargs['ingredients_per_recipe'])
+        link_recipes(Favorite, user_ids, recipe_ids,
+                     kwargs['favorites_per_user'], 'Seeding favorites')
+        link_recipes(ShoppingCart, user_ids, recipe_ids,
+                     kwargs['cart_per_user'], 'Seeding shopping carts')
+        create_follows(user_ids, author_ids, kwargs['follows_per_user'])
+        refresh_denormalized_data()
+        self.stdout.write(self.style.SUCCESS(
+            f'Benchmark data seeded: {len(user_ids)} users, '
+            f'{len(recipe_ids)} recipes in '
+            f'{time.perf_counter() - started:.2f}s.'))
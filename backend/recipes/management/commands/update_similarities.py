@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import SIMILARITY_BATCH_SIZE, update_similarities
+
+
+class Command(BaseCommand):
+    help = ('Recompute similar recipes from favorites co-occurrence for '
+            'recipes whose favorites changed since the last run')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full',
+                            action='store_true',
+                            help='Recompute similar recipes of all recipes')
+        parser.add_argument('--top-k',
+                            type=int,
+                            default=settings.SIMILAR_RECIPES_COUNT,
+                            help=(f'Similar recipes stored per recipe '
+                                  f'(default: '
+                                  f'{settings.SIMILAR_RECIPES_COUNT})'))
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=SIMILARITY_BATCH_SIZE,
+                            help=(f'Recipes processed per batch '
+                                  f'(default: {SIMILARITY_BATCH_SIZE})'))
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        processed = update_similarities(
+            kwargs['full'], kwargs['top_k'], kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Similar recipes updated for {processed} recipes in '
+            f'{time.perf_counter() - started:.2f}s.'))
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.3 on 2026-10-17 05:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_ingredients_count(apps, schema_editor):
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(ingredients_count=Coalesce(Subquery(
+        IngredientAmount.objects.filter(recipe=OuterRef('pk')).order_by(
+        ).values('recipe').annotate(count=Count('pk')).values('count')
+    ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='ingredients count'),
+        ),
+        migrations.RunPython(fill_ingredients_count,
+                             migrations.RunPython.noop),
+    ]
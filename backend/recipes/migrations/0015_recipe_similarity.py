@@ -0,0 +1,48 @@
+# Generated by Django 3.2.3 on 2026-10-17 05:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_favorited_recipes(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.filter(favorites_count__gt=0).update(
+        similarities_outdated=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='similarities_outdated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='similar recipes need recomputing'),
+        ),
+        migrations.CreateModel(
+            name='RecipeSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='similarity score')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='recipes.recipe', verbose_name='recipe')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='recipes.recipe', verbose_name='similar recipe')),
+            ],
+            options={
+                'verbose_name': 'recipe similarity',
+                'verbose_name_plural': 'recipe similarities',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipesimilarity',
+            index=models.Index(fields=['recipe', '-score'], name='recipe_similarity_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipesimilarity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'similar'), name='similarity already computed'),
+        ),
+        migrations.RunPython(mark_favorited_recipes,
+                             migrations.RunPython.noop),
+    ]
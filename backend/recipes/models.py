@@ -1,5 +1,6 @@
 from colorfield.fields import ColorField
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -39,6 +40,16 @@ class User(AbstractUser):
         constants.LAST_NAME,
         max_length=constants.USER_NAME_LENGTH,
     )
+    recipes_count = models.PositiveIntegerField(
+        constants.RECIPES_COUNT,
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        constants.FOLLOWERS_COUNT,
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('username',)
@@ -153,10 +164,38 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name=constants.PUB_DATE
     )
+    favorites_count = models.PositiveIntegerField(
+        constants.FAVORITES_COUNT,
+        default=0,
+        editable=False
+    )
+    ingredients_count = models.PositiveIntegerField(
+        constants.INGREDIENTS_COUNT,
+        default=0,
+        editable=False
+    )
+    similarities_outdated = models.BooleanField(
+        constants.SIMILARITIES_OUTDATED,
+        default=False,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        constants.SEARCH_VECTOR,
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'recipes'
+        indexes = (
+            models.Index(fields=('author', '-pub_date'),
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=('-favorites_count', '-pub_date'),
+                         name='recipe_popularity_idx'),
+        )
         verbose_name = constants.RECIPE
         verbose_name_plural = constants.RECIPES
 
@@ -266,6 +305,41 @@ class ShoppingCart(models.Model):
         return constants.RECIPE_IN_SHOPPING_CART.format(self.recipe, self.user)
 
 
+class ShoppingCartIngredient(models.Model):
+    """
+    Model representing the total amount of an ingredient across
+    the recipes in a user's shopping cart.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=constants.USER
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name=constants.INGREDIENT
+    )
+    amount = models.IntegerField(
+        constants.SHOPPING_CART_TOTAL
+    )
+
+    class Meta:
+        verbose_name = constants.SHOPPING_CART_INGREDIENT
+        verbose_name_plural = constants.SHOPPING_CART_INGREDIENTS
+        default_related_name = 'cart_ingredients'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name=constants.INGREDIENT_IN_SHOPPING_CART),
+        )
+
+    def __str__(self):
+        return (f'{self.ingredient}: '
+                f'{self.amount} {self.ingredient.measurement_unit}')
+
+
 class Follow(models.Model):
     """
     Model representing a user following another user.
@@ -294,3 +368,79 @@ class Follow(models.Model):
 
     def __str__(self):
         return constants.FOLLOWS.format(self.user, self.author)
+
+
+class FeedEntry(models.Model):
+    """
+    Model representing a recipe in the feed of a user who follows
+    its author.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=constants.USER
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name=constants.RECIPE
+    )
+    pub_date = models.DateTimeField(
+        constants.PUB_DATE
+    )
+
+    class Meta:
+        verbose_name = constants.FEED_ENTRY
+        verbose_name_plural = constants.FEED_ENTRIES
+        default_related_name = 'feed_entries'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'), name=constants.RECIPE_IN_FEED),
+        )
+        indexes = (
+            models.Index(fields=('user', '-pub_date'),
+                         name='feed_entry_user_pub_date_idx'),
+        )
+
+    def __str__(self):
+        return constants.RECIPE_IN_USER_FEED.format(self.recipe, self.user)
+
+
+class RecipeSimilarity(models.Model):
+    """
+    Model representing a recipe often favorited together with
+    another recipe.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name=constants.RECIPE
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name=constants.SIMILAR_RECIPE
+    )
+    score = models.FloatField(
+        constants.SIMILARITY_SCORE
+    )
+
+    class Meta:
+        verbose_name = constants.RECIPE_SIMILARITY
+        verbose_name_plural = constants.RECIPE_SIMILARITIES
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name=constants.SIMILARITY_EXISTS),
+        )
+        indexes = (
+            models.Index(fields=('recipe', '-score'),
+                         name='recipe_similarity_score_idx'),
+        )
+
+    def __str__(self):
+        return constants.SIMILAR_TO.format(self.similar, self.recipe)
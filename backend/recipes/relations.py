@@ -0,0 +1,168 @@
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from .counters import update_counter
+from .models import Favorite, Recipe
+from .shopping_cart import apply_cart_deltas, recipe_totals
+
+
+def relation_sql(model, target, connection):
+    """
+    Return quoted names of the table, the user column, the target
+    column and the target table with its primary key column.
+    """
+    quote = connection.ops.quote_name
+    field = model._meta.get_field(target)
+    related = field.related_model._meta
+    return (quote(model._meta.db_table),
+            quote(model._meta.get_field('user').column),
+            quote(field.column),
+            quote(related.db_table),
+            quote(related.pk.column))
+
+
+def link(model, user_id, target, target_id):
+    """
+    Insert a row linking the user to the target, e.g. a favorite
+    recipe, in a single statement that does nothing if the target
+    does not exist or the row is already there, then send post_save
+    so that receivers keep derived data up to date.
+
+    Returns:
+        bool: Whether the row was inserted.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table, user_column, target_column, related_table, related_pk = (
+        relation_sql(model, target, connection))
+    field = model._meta.get_field(target)
+    attname, target_id = field.attname, field.get_prep_value(target_id)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({user_column}, {target_column}) '
+                f'SELECT %s, {related_pk} FROM {related_table} '
+                f'WHERE {related_pk} = %s ON CONFLICT DO NOTHING',
+                (user_id, target_id))
+            created = cursor.rowcount == 1
+        if created:
+            post_save.send(
+                sender=model,
+                instance=model(user_id=user_id, **{attname: target_id}),
+                created=True, update_fields=None, raw=False, using=using)
+    return created
+
+
+def unlink(model, user_id, target, target_id):
+    """
+    Delete the row linking the user to the target in a single
+    statement, then send pre_delete and post_delete for the removed
+    row. The targets themselves are untouched, so pre_delete
+    receivers still see them.
+
+    Returns:
+        bool: Whether the row was deleted.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table, user_column, target_column, _, _ = (
+        relation_sql(model, target, connection))
+    field = model._meta.get_field(target)
+    attname, target_id = field.attname, field.get_prep_value(target_id)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} '
+                f'WHERE {user_column} = %s AND {target_column} = %s',
+                (user_id, target_id))
+            deleted = cursor.rowcount == 1
+        if deleted:
+            instance = model(user_id=user_id, **{attname: target_id})
+            for signal in (pre_delete, post_delete):
+                signal.send(sender=model, instance=instance, using=using)
+    return deleted
+
+
+def existing_recipes(recipe_ids):
+    """
+    Return the IDs of the recipes that exist.
+    """
+    return set(Recipe.objects.filter(
+        pk__in=recipe_ids).values_list('pk', flat=True))
+
+
+def update_recipe_lists(model, user_id, recipe_ids, sign):
+    """
+    Make the changes that receivers make for single rows after
+    recipes were bulk added to (sign 1) or removed from (sign -1)
+    favorites or the shopping cart.
+    """
+    if not recipe_ids:
+        return
+    if model is Favorite:
+        update_counter(Recipe, recipe_ids, 'favorites_count', sign,
+                       similarities_outdated=True)
+    else:
+        apply_cart_deltas((user_id,), {
+            id: sign * total for id, total
+            in recipe_totals(recipe_ids).items()})
+
+
+def add_recipes(model, user_id, recipe_ids):
+    """
+    Add recipes to favorites or the shopping cart with one insert
+    returning the rows it actually created, so that recipes added
+    concurrently by another request are not counted twice.
+
+    Returns:
+        tuple: Sets of existing and of added recipe IDs.
+    """
+    if not recipe_ids:
+        return set(), set()
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table, user_column, target_column, related_table, related_pk = (
+        relation_sql(model, 'recipe', connection))
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({user_column}, {target_column}) '
+                f'SELECT %s, {related_pk} FROM {related_table} '
+                f'WHERE {related_pk} IN ({placeholders}) '
+                f'ON CONFLICT DO NOTHING RETURNING {target_column}',
+                (user_id, *recipe_ids))
+            added = {recipe_id for recipe_id, in cursor.fetchall()}
+        update_recipe_lists(model, user_id, added, 1)
+        found = existing_recipes(recipe_ids)
+    return found, added
+
+
+def remove_recipes(model, user_id, recipe_ids):
+    """
+    Remove recipes from favorites or the shopping cart with one
+    delete returning the rows it actually removed. Signals are not
+    sent per row, update_recipe_lists() does their work for the
+    whole set instead.
+
+    Returns:
+        tuple: Sets of existing and of removed recipe IDs.
+    """
+    if not recipe_ids:
+        return set(), set()
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table, user_column, target_column, _, _ = (
+        relation_sql(model, 'recipe', connection))
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {user_column} = %s '
+                f'AND {target_column} IN ({placeholders}) '
+                f'RETURNING {target_column}',
+                (user_id, *recipe_ids))
+            removed = {recipe_id for recipe_id, in cursor.fetchall()}
+        update_recipe_lists(model, user_id, removed, -1)
+        found = existing_recipes(recipe_ids)
+    return found, removed
@@ -0,0 +1,179 @@
+import itertools
+import random
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+from tqdm import tqdm
+
+from .counters import reconcile_counters
+from .feed import rebuild_feeds
+from .models import Follow, IngredientAmount, Recipe, Tag, User
+from .shopping_cart import rebuild_cart_summaries
+
+SEED_BATCH_SIZE = 5000
+DISHES = ('суп', 'салат', 'торт', 'пирог', 'рагу', 'плов', 'омлет', 'паста')
+MAIN_INGREDIENTS = ('курица', 'рис', 'грибы', 'лосось', 'говядина',
+                    'овощи', 'творог', 'яблоки', 'шоколад', 'фасоль')
+STYLES = ('домашний', 'быстрый', 'праздничный', 'постный', 'острый',
+          'шоколадный', 'летний', 'бабушкин')
+TAGS = (('Завтрак', 'breakfast', '#E26C2D'),
+        ('Обед', 'lunch', '#49B64E'),
+        ('Ужин', 'dinner', '#8775D2'))
+
+
+def bulk_insert(model, objects, description, ignore_conflicts=False):
+    """
+    Insert unsaved objects in batches with a progress bar.
+
+    Returns:
+        int: Number of objects passed in.
+    """
+    objects = iter(objects)
+    inserted = 0
+    with tqdm(desc=description, unit=' row') as bar:
+        while batch := list(itertools.islice(objects, SEED_BATCH_SIZE)):
+            model.objects.bulk_create(batch,
+                                      ignore_conflicts=ignore_conflicts)
+            inserted += len(batch)
+            bar.update(len(batch))
+    return inserted
+
+
+@lru_cache(maxsize=4)
+def cumulative_weights(size):
+    return tuple(itertools.accumulate(
+        1 / rank for rank in range(1, size + 1)))
+
+
+def long_tail_choices(ids, k):
+    """
+    Pick up to k distinct IDs, the first IDs being much more popular
+    than the last ones, like real favorites are.
+    """
+    return set(random.choices(
+        ids, cum_weights=cumulative_weights(len(ids)), k=k))
+
+
+def create_users(count, prefix):
+    """
+    Create users named prefix-N with unusable passwords.
+
+    Returns:
+        list: IDs of all users with the prefix.
+    """
+    first = User.objects.filter(username__startswith=f'{prefix}-').count()
+    password = make_password(None)
+    bulk_insert(User, (
+        User(username=f'{prefix}-{number}',
+             email=f'{prefix}-{number}@example.com',
+             first_name=prefix.capitalize(), last_name=str(number),
+             password=password)
+        for number in range(first, first + count)
+    ), 'Seeding users')
+    return list(User.objects.filter(
+        username__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+
+def generate_recipes(author_ids, count):
+    """
+    Yield unsaved synthetic recipes with searchable names and texts.
+    """
+    combinations = itertools.cycle(itertools.product(
+        STYLES, DISHES, MAIN_INGREDIENTS))
+    authors = itertools.cycle(author_ids)
+    for number, (style, dish, ingredient) in zip(range(count), combinations):
+        yield Recipe(
+            author_id=next(authors),
+            name=f'{style} {dish} с {ingredient} №{number}',
+            text=(f'Приготовьте {dish}: возьмите {ingredient}, '
+                  f'добавьте специи и подавайте {style} стол.'),
+            image='recipes/benchmark.webp',
+            cooking_time=number % 120 + 1,
+        )
+
+
+def create_recipes(author_ids, count):
+    """
+    Create synthetic recipes by the given authors.
+
+    Returns:
+        list: IDs of the created recipes.
+    """
+    last_id = Recipe.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    bulk_insert(Recipe, generate_recipes(author_ids, count),
+                'Seeding recipes')
+    return list(Recipe.objects.filter(
+        pk__gt=last_id, author_id__in=author_ids
+    ).values_list('pk', flat=True))
+
+
+def fill_recipes(recipe_ids, ingredient_ids, tag_ids,
+                 ingredients_per_recipe):
+    """
+    Give synthetic recipes random ingredients and tags.
+    """
+    bulk_insert(IngredientAmount, (
+        IngredientAmount(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=random.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in random.sample(
+            ingredient_ids,
+            min(len(ingredient_ids),
+                random.randint(1, ingredients_per_recipe * 2 - 1)))
+    ), 'Seeding ingredient amounts', ignore_conflicts=True)
+    bulk_insert(Recipe.tags.through, (
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in random.sample(tag_ids,
+                                    random.randint(1, len(tag_ids)))
+    ), 'Seeding recipe tags', ignore_conflicts=True)
+
+
+def link_recipes(model, user_ids, recipe_ids, per_user, description):
+    """
+    Create favorites or shopping cart items, about per_user of them
+    for each user, with a long-tailed recipe popularity.
+    """
+    return bulk_insert(model, (
+        model(user_id=user_id, recipe_id=recipe_id)
+        for user_id in user_ids
+        for recipe_id in long_tail_choices(recipe_ids, per_user)
+    ), description, ignore_conflicts=True)
+
+
+def create_follows(user_ids, author_ids, per_user):
+    """
+    Make each user follow about per_user authors, popular authors
+    being followed more.
+    """
+    return bulk_insert(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in long_tail_choices(author_ids, per_user)
+        if author_id != user_id
+    ), 'Seeding follows', ignore_conflicts=True)
+
+
+def create_tags():
+    """
+    Create the default tags if there are none.
+
+    Returns:
+        list: IDs of all tags.
+    """
+    if not Tag.objects.exists():
+        Tag.objects.bulk_create(Tag(name=name, slug=slug, color=color)
+                                for name, slug, color in TAGS)
+    return list(Tag.objects.values_list('pk', flat=True))
+
+
+def refresh_denormalized_data():
+    """
+    Bring data maintained by signals up to date after bulk inserts.
+    """
+    reconcile_counters()
+    rebuild_cart_summaries()
+    rebuild_feeds()
+    Recipe.objects.filter(favorites_count__gt=0).update(
+        similarities_outdated=True)
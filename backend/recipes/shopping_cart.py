@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import IngredientAmount, ShoppingCart, ShoppingCartIngredient
+
+
+def recipe_totals(recipe_ids):
+    """
+    Return total amounts per ingredient ID for the given recipes.
+    """
+    return dict(IngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient').annotate(
+        total=Sum('amount')
+    ).order_by().values_list('ingredient', 'total'))
+
+
+def apply_cart_deltas(user_ids, deltas):
+    """
+    Add per-ingredient amount deltas to the shopping cart summaries
+    of the given users, dropping ingredients that reach zero.
+    """
+    deltas = {id: delta for id, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        ShoppingCartIngredient.objects.bulk_create(
+            (ShoppingCartIngredient(user_id=user_id, ingredient_id=id,
+                                    amount=0)
+             for user_id in user_ids
+             for id, delta in deltas.items() if delta > 0),
+            ignore_conflicts=True
+        )
+        summaries = ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas)
+        summaries.update(amount=F('amount') + Case(
+            *(When(ingredient_id=id, then=Value(delta))
+              for id, delta in deltas.items()),
+            default=Value(0)
+        ))
+        summaries.filter(amount__lte=0).delete()
+
+
+def apply_recipe_deltas(recipe, deltas):
+    """
+    Apply ingredient amount changes of a recipe to the shopping
+    cart summaries of every user who has it in the cart.
+    """
+    apply_cart_deltas(
+        list(ShoppingCart.objects.filter(
+            recipe=recipe).values_list('user_id', flat=True)),
+        deltas
+    )
+
+
+def rebuild_cart_summaries(user_ids=None):
+    """
+    Recompute shopping cart summaries from the cart contents,
+    for the given users or for everyone.
+    """
+    summaries = ShoppingCartIngredient.objects.all()
+    amounts = IngredientAmount.objects.filter(
+        recipe__cart_items__isnull=False)
+    if user_ids is not None:
+        summaries = summaries.filter(user_id__in=user_ids)
+        amounts = IngredientAmount.objects.filter(
+            recipe__cart_items__user_id__in=user_ids)
+    with transaction.atomic():
+        summaries.delete()
+        ShoppingCartIngredient.objects.bulk_create(
+            ShoppingCartIngredient(user_id=row['recipe__cart_items__user'],
+                                   ingredient_id=row['ingredient'],
+                                   amount=row['total'])
+            for row in amounts.values(
+                'recipe__cart_items__user', 'ingredient'
+            ).annotate(total=Sum('amount')).order_by().iterator()
+        )
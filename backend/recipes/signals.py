@@ -0,0 +1,89 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .counters import update_counter
+from .feed import fan_out_recipe, follow_author, unfollow_author
+from .models import (Favorite, Follow, IngredientAmount, Recipe, ShoppingCart,
+                     User)
+from .shopping_cart import apply_cart_deltas, recipe_totals
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, (instance.recipe_id,), 'favorites_count', 1,
+                       similarities_outdated=True)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    update_counter(Recipe, (instance.recipe_id,), 'favorites_count', -1,
+                   similarities_outdated=True)
+
+
+@receiver(post_save, sender=IngredientAmount)
+def increment_ingredients_count(instance, created, **kwargs):
+    if created:
+        update_counter(Recipe, (instance.recipe_id,), 'ingredients_count', 1)
+
+
+@receiver(post_delete, sender=IngredientAmount)
+def decrement_ingredients_count(instance, **kwargs):
+    update_counter(Recipe, (instance.recipe_id,), 'ingredients_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        update_counter(User, (instance.author_id,), 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    update_counter(User, (instance.author_id,), 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_follower_feeds(instance, created, **kwargs):
+    if created:
+        fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_feed(instance, created, **kwargs):
+    if created:
+        follow_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_feed(instance, **kwargs):
+    unfollow_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(instance, created, **kwargs):
+    if created:
+        update_counter(User, (instance.author_id,), 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(instance, **kwargs):
+    update_counter(User, (instance.author_id,), 'followers_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_cart_summary(instance, created, **kwargs):
+    if created:
+        apply_cart_deltas((instance.user_id,),
+                          recipe_totals((instance.recipe_id,)))
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_cart_summary(instance, **kwargs):
+    """
+    Subtract the recipe before deletion, while its ingredient
+    amounts still exist even if the recipe itself is being deleted.
+    """
+    apply_cart_deltas((instance.user_id,), {
+        id: -total for id, total
+        in recipe_totals((instance.recipe_id,)).items()})
@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Favorite, Recipe, RecipeSimilarity
+
+SIMILARITY_BATCH_SIZE = 1000
+# Users with more favorites than this add little signal and
+# quadratic work, so they are left out of co-occurrence counts.
+MAX_USER_FAVORITES = 1000
+
+
+class FavoriteMatrix:
+    """
+    Sparse user-recipe favorites matrix stored as adjacency lists
+    in both directions.
+    """
+
+    def __init__(self, favorites):
+        self.recipes_of = defaultdict(list)
+        self.users_of = defaultdict(list)
+        for user_id, recipe_id in favorites:
+            self.recipes_of[user_id].append(recipe_id)
+            self.users_of[recipe_id].append(user_id)
+
+    def co_occurrences(self, recipe_id):
+        """
+        Count how many users favorited each other recipe together
+        with the given one.
+        """
+        counts = Counter()
+        for user_id in self.users_of.get(recipe_id, ()):
+            recipes = self.recipes_of[user_id]
+            if len(recipes) <= MAX_USER_FAVORITES:
+                counts.update(recipes)
+        counts.pop(recipe_id, None)
+        return counts
+
+
+def load_favorites(recipe_ids=None):
+    """
+    Load the favorites matrix, limited to the users who favorited
+    the given recipes if they are passed.
+    """
+    favorites = Favorite.objects.order_by()
+    if recipe_ids is not None:
+        favorites = favorites.filter(user_id__in=Favorite.objects.filter(
+            recipe_id__in=recipe_ids).values('user_id'))
+    return FavoriteMatrix(
+        favorites.values_list('user_id', 'recipe_id').iterator())
+
+
+def compute_similarities(matrix, recipe_ids, top_k):
+    """
+    Yield the top_k most similar recipes for each of the given
+    recipes as (recipe ID, similar recipe ID, score) tuples.
+
+    The score is the cosine similarity of the recipes' favoriting
+    users: co-occurrences divided by the geometric mean of the
+    recipes' favorites counts.
+    """
+    counts = {recipe_id: matrix.co_occurrences(recipe_id)
+              for recipe_id in recipe_ids}
+    ids = iter(counts.keys() | {id for counter in counts.values()
+                                for id in counter})
+    favorites_counts = {}
+    while chunk := list(itertools.islice(ids, SIMILARITY_BATCH_SIZE)):
+        favorites_counts.update(Recipe.objects.filter(
+            pk__in=chunk).values_list('pk', 'favorites_count'))
+    for recipe_id, counter in counts.items():
+        recipe_count = favorites_counts.get(recipe_id) or 1
+        scores = (
+            (count / math.sqrt(
+                recipe_count * (favorites_counts.get(similar_id) or 1)),
+             similar_id)
+            for similar_id, count in counter.items()
+        )
+        for score, similar_id in heapq.nlargest(top_k, scores):
+            yield recipe_id, similar_id, score
+
+
+def update_similarities(full=False, top_k=None,
+                        batch_size=SIMILARITY_BATCH_SIZE):
+    """
+    Recompute similar recipes of the recipes whose favorites
+    changed since the last run, or of all recipes.
+
+    Only the changed recipes' own lists are refreshed; recipes
+    listing them as similar catch up when they change themselves
+    or on a full run.
+
+    Returns:
+        int: Number of recipes processed.
+    """
+    if top_k is None:
+        top_k = settings.SIMILAR_RECIPES_COUNT
+    recipes = Recipe.objects.order_by()
+    if not full:
+        recipes = recipes.filter(similarities_outdated=True)
+    recipe_ids = iter(list(recipes.values_list('pk', flat=True)))
+    matrix = load_favorites() if full else None
+    processed = 0
+    while batch := list(itertools.islice(recipe_ids, batch_size)):
+        # Clear the flags before reading favorites, so favorites
+        # changed while the batch is computed mark it again.
+        Recipe.objects.filter(pk__in=batch).update(
+            similarities_outdated=False)
+        similarities = [
+            RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                             score=score)
+            for recipe_id, similar_id, score in compute_similarities(
+                matrix or load_favorites(batch), batch, top_k)
+        ]
+        with transaction.atomic():
+            RecipeSimilarity.objects.filter(recipe_id__in=batch).delete()
+            RecipeSimilarity.objects.bulk_create(similarities)
+        processed += len(batch)
+    return processed